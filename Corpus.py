@@ -0,0 +1,157 @@
+'''
+Binary graph corpus built from a `Dataset`, loaded with `np.memmap`
+
+    python Corpus.py dataset.csv corpus/
+'''
+from Dataset import Dataset
+import numpy as np
+import json
+import os
+
+
+class Corpus:
+    '''
+    public class
+
+    One directory, CSR layout over all graphs:
+    - `nodePtr` (`int64[G+1]`): nodes of graph `g` are rows `nodePtr[g]:nodePtr[g+1]`
+    of `nodeOffsets` (`int32`) and `textIds` (`int32`, index in the vocabulary)
+    - `edgePtr` (`int64[G+1]`): edges of graph `g` are rows `edgePtr[g]:edgePtr[g+1]`
+    of `edgeFrom`, `edgeTo` (`int32`, node indices in the graph) and `edgeWeight` (`float32`)
+    - `labels.npy`: the multi-hot labels, one row per graph
+    - `meta.json`: array lengths, label names and the vocabulary of normalized opcode texts
+
+    Arrays are raw files mapped read-only, a graph is a set of slices, nothing is copied.
+    The edges are those of `Dataset.jsonToNx`, self-loops included.
+    '''
+    META = 'meta.json'
+    LABELS = 'labels.npy'
+    EXTENSION = '.bin'
+    ARRAYS = {'nodePtr': np.int64,
+              'edgePtr': np.int64,
+              'nodeOffsets': np.int32,
+              'textIds': np.int32,
+              'edgeFrom': np.int32,
+              'edgeTo': np.int32,
+              'edgeWeight': np.float32}
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+        with open(os.path.join(directory, Corpus.META)) as fp:
+            meta = json.load(fp)
+        self._vocabulary = meta['vocabulary']
+        self._labelNames = meta['labelNames']
+        self._arrays = {}
+        for name, dtype in Corpus.ARRAYS.items():
+            length = meta['lengths'][name]
+            if length:
+                self._arrays[name] = np.memmap(os.path.join(directory, name + Corpus.EXTENSION),
+                                               dtype=dtype, mode='r', shape=(length,))
+            else:
+                self._arrays[name] = np.zeros(0, dtype=dtype)  # empty files can not be mapped
+        self._labels = np.load(os.path.join(directory, Corpus.LABELS), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self._arrays['nodePtr']) - 1
+
+    def __getitem__(self, index: int) -> dict:
+        '''
+        return the arrays of one graph, see `GraphArrays.getEdges`
+        '''
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('graph index out of range')
+        arrays = self._arrays
+        nodeStart, nodeEnd = arrays['nodePtr'][index:index + 2]
+        edgeStart, edgeEnd = arrays['edgePtr'][index:index + 2]
+        return {'nodeOffsets': arrays['nodeOffsets'][nodeStart:nodeEnd],
+                'textIds': arrays['textIds'][nodeStart:nodeEnd],
+                'edgeFrom': arrays['edgeFrom'][edgeStart:edgeEnd],
+                'edgeTo': arrays['edgeTo'][edgeStart:edgeEnd],
+                'edgeWeight': arrays['edgeWeight'][edgeStart:edgeEnd]}
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def chunks(self, size: int, indices: list = None):
+        '''
+        yield lists of at most `size` graphs, in order
+        - `indices` (`list`): only the graphs at these indices if given
+        '''
+        if indices is None:
+            indices = range(len(self))
+        for start in range(0, len(indices), size):
+            yield [self[i] for i in indices[start:start + size]]
+
+    @property
+    def getVocabulary(self) -> list:
+        return self._vocabulary
+
+    @property
+    def getLabels(self) -> np.ndarray:
+        return self._labels
+
+    @property
+    def getLabelNames(self) -> list:
+        return self._labelNames
+
+    def getLabel(self, vul: str) -> np.ndarray:
+        return self._labels[:, self._labelNames.index(vul)]
+
+    def getNodeTexts(self, graph: dict) -> list:
+        return [self._vocabulary[i] for i in graph['textIds'].tolist()]
+
+    @staticmethod
+    def build(dataset: Dataset, directory: str):
+        '''
+        write the graphs of `dataset` to `directory` one by one, return the loaded `Corpus`
+        '''
+        os.makedirs(directory, exist_ok=True)
+        vocabulary = {}  # {text: id}
+        lengths = {name: 0 for name in Corpus.ARRAYS}
+        files = {name: open(os.path.join(directory, name + Corpus.EXTENSION), 'wb')
+                 for name in Corpus.ARRAYS}
+
+        def write(name: str, values):
+            array = np.asarray(values, dtype=Corpus.ARRAYS[name])
+            array.tofile(files[name])
+            lengths[name] += len(array)
+
+        try:
+            write('nodePtr', [0])
+            write('edgePtr', [0])
+            for gnx, nodeindices, features in dataset.graphs:
+                nodeToIndex = {offset: i for i, offset in enumerate(nodeindices)}
+                edges = [(nodeToIndex[u], nodeToIndex[v], data.get('weight', 1))
+                         for u, v, data in gnx.edges(data=True)]
+                edgeArray = np.array(edges, dtype=np.float64).reshape(-1, 3)
+                write('nodeOffsets', nodeindices)
+                write('textIds', [vocabulary.setdefault(text, len(vocabulary))
+                                  for text in features])
+                write('edgeFrom', edgeArray[:, 0])
+                write('edgeTo', edgeArray[:, 1])
+                write('edgeWeight', edgeArray[:, 2])
+                write('nodePtr', [lengths['nodeOffsets']])
+                write('edgePtr', [lengths['edgeFrom']])
+        finally:
+            for fp in files.values():
+                fp.close()
+        labels = dataset.mulHotLabels
+        np.save(os.path.join(directory, Corpus.LABELS),
+                labels if labels is not None else np.zeros((0, 0)))
+        meta = {'lengths': lengths,
+                'labelNames': list(dataset.labels.keys()),
+                'vocabulary': list(vocabulary.keys())}
+        with open(os.path.join(directory, Corpus.META), 'w') as fp:
+            json.dump(meta, fp)
+        return Corpus(directory)
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 3:
+        print(f'usage: python {sys.argv[0]} dataset.csv directory')
+        sys.exit(1)
+    corpus = Corpus.build(Dataset(sys.argv[1], streaming=True), sys.argv[2])
+    print(f'{len(corpus)} graphs, {len(corpus.getVocabulary)} distinct blocks')
@@ -1,18 +1,98 @@
+from array import array
+import csv
+import io
+import itertools
 import json
-import re
+import sys
 import pandas as pd
 import networkx as nx
+from cfg.OpcodeNormalizer import OpcodeNormalizer
 
 DATAPATH = '/path/to/dataset'
 
 
 class Dataset:
-    def __init__(self, csvFile=DATAPATH, weighted: bool = True) -> None:
+    '''
+    - `streaming` (`bool`): if `True`, only index the byte offsets of the rows,
+    `graphs` is then a `GraphSequence` which builds each graph on access
+    '''
+
+    def __init__(self, csvFile=DATAPATH, weighted: bool = True, streaming: bool = False) -> None:
         self.file = csvFile
         self.graphs = []
         self.labels = {}
         self.mulHotLabels = None
-        self.init(weighted)
+        if streaming:
+            self.initStreaming(weighted)
+        else:
+            self.init(weighted)
+
+    def __len__(self) -> int:
+        return len(self.graphs)
+
+    def __getitem__(self, index: int):
+        return self.graphs[index]
+
+    def chunks(self, size: int, indices: list = None):
+        '''
+        yield lists of at most `size` graphs, in order
+        - `indices` (`list`): only the graphs at these indices if given
+        '''
+        if indices is not None:
+            for start in range(0, len(indices), size):
+                yield [self.graphs[i] for i in indices[start:start + size]]
+            return
+        iterator = iter(self.graphs)
+        while True:
+            chunk = list(itertools.islice(iterator, size))
+            if not len(chunk):
+                return
+            yield chunk
+
+    def initStreaming(self, weighted: bool = True):
+        '''
+        one pass over the file: record the offset of each row and keep the label columns only
+        '''
+        csv.field_size_limit(sys.maxsize)
+        offsets = array('Q')
+        rows = []
+        with open(self.file, 'rb') as fp:
+            header = next(csv.reader([fp.readline().decode()]))
+            for offset, record in Dataset.iterRecords(fp):
+                offsets.append(offset)
+                row = next(csv.reader(io.StringIO(record.decode())))
+                rows.append(row[2:])
+        print('file indexed.')
+        df = pd.DataFrame(rows, columns=header[2:]).apply(pd.to_numeric)
+        self.mulHotLabels = df.values
+        for vul in df.columns:
+            self.labels[vul] = df[vul]
+        self.graphs = GraphSequence(self, offsets, header.index('cfg'), weighted)
+        print('init finished.')
+
+    @staticmethod
+    def iterRecords(fp):
+        '''
+        yield (byte offset, raw record) of the CSV rows after the current position,
+        a quoted cell may span several lines, so a record ends on a line with balanced quotes
+        '''
+        offset = fp.tell()
+        start = offset
+        parts = []
+        quotes = 0
+        for line in fp:
+            parts.append(line)
+            quotes += line.count(b'"')
+            offset += len(line)
+            if quotes % 2 == 0:
+                record = b''.join(parts)
+                if record.strip():
+                    yield start, record
+                start = offset
+                parts = []
+                quotes = 0
+        if len(parts):
+            yield start, b''.join(parts)
 
     def init(self, weighted: bool = True):
         df = pd.read_csv(self.file)
@@ -21,13 +101,16 @@ class Dataset:
         for vul in df.columns[2:]:
             labels = df[vul]
             self.labels[vul] = labels
-        for _, row in df.iterrows():
-            graph = self.jsonToNx(row['cfg'], weighted)
+        for cfg in df['cfg']:
+            graph = self.jsonToNx(cfg, weighted)
             self.graphs.append(graph)
         print('init finished.')
 
     def jsonToNx(self, jsonStr: str, weighted: bool = True):
-        patterns = [r'(0x)*[0-9]*: ', r':*0x[0-9|a-f]*']
+        '''
+        features are the "normalizedOpcodes" of the nodes if present,
+        else the "parsedOpcodes" normalized in one batch
+        '''
         gnx = nx.DiGraph()
         data = json.loads(jsonStr)
         nodeindices = []
@@ -44,11 +127,62 @@ class Dataset:
             else:
                 gnx.add_edge(node['offset'], node['offset'])  # self loop
             nodeindices.append(node['offset'])
-            ops = node['parsedOpcodes']
+            features.append(node.get('normalizedOpcodes', None))
+        if None in features:
             # remove offset and operand (or unknown opcode)
-            ops = ops.replace('\n', ' ')
-            for p in patterns:
-                ops = re.sub(p, '', ops)
-            ops = ' '.join(ops.split())
-            features.append(ops)
+            features = OpcodeNormalizer.normalizeAll(
+                [node['parsedOpcodes'] for node in data['nodes']])
         return gnx, nodeindices, features
+
+
+class GraphSequence:
+    '''
+    public class
+
+    Read-only sequence of `(graph, nodeindices, features)` backed by the byte offsets of the
+    CSV rows, graphs are parsed on access and not kept
+    '''
+
+    def __init__(self, dataset: Dataset, offsets: array, cfgColumn: int, weighted: bool = True) -> None:
+        self._dataset = dataset
+        self._offsets = offsets
+        self._cfgColumn = cfgColumn
+        self._weighted = weighted
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('graph index out of range')
+        return self._dataset.jsonToNx(self.getCfg(index), self._weighted)
+
+    def __iter__(self):
+        '''
+        sequential read, a single open file and no seek
+        '''
+        if not len(self):
+            return
+        with open(self._dataset.file, 'rb') as fp:
+            fp.seek(self._offsets[0])
+            for _, record in Dataset.iterRecords(fp):
+                yield self.__toGraph(record)
+
+    def getCfg(self, index: int) -> str:
+        '''
+        return the raw cfg json string of a row
+        '''
+        with open(self._dataset.file, 'rb') as fp:
+            fp.seek(self._offsets[index])
+            _, record = next(Dataset.iterRecords(fp))
+        return self.__parseCfg(record)
+
+    def __toGraph(self, record: bytes):
+        return self._dataset.jsonToNx(self.__parseCfg(record), self._weighted)
+
+    def __parseCfg(self, record: bytes) -> str:
+        return next(csv.reader(io.StringIO(record.decode())))[self._cfgColumn]
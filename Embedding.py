@@ -0,0 +1,35 @@
+'''
+Batched embedding of block texts, independent of the embedding model
+'''
+import numpy as np
+
+BATCHSIZE = 1024
+
+
+def embedInBatches(texts: list, run, batchSize: int = BATCHSIZE) -> np.ndarray:
+    '''
+    return the embeddings of `texts` as a (len(texts), dim) array
+    - `run`: the model call, a list of texts to an array
+    - `batchSize` (`int`): texts per call
+    '''
+    results = []
+    for start in range(0, len(texts), batchSize):
+        results.append(np.asarray(run(texts[start:start + batchSize])))
+    if not len(results):
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.concatenate(results)
+
+
+def embedGraphs(featureLists: list, embed) -> list:
+    '''
+    embed the block texts of many graphs at once, return one (blocks, dim) array per graph
+    - `featureLists` (`list`): the block texts of each graph
+    - `embed`: a list of texts to an array, called once with the distinct texts
+    '''
+    textIds = {}  # {text: row}
+    indices = []
+    for features in featureLists:
+        indices.append(np.fromiter((textIds.setdefault(text, len(textIds)) for text in features),
+                                   dtype=np.int64, count=len(features)))
+    embeddings = embed(list(textIds.keys()))
+    return [embeddings[index] for index in indices]
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import json
+import os
+import sqlite3
+
+
+class EmbeddingCache:
+    '''
+    public class
+
+    Cache of block text embeddings keyed by (USE model digest, normalized block text),
+    so an identical block is embedded once per model, across contracts and runs.
+
+    Two tiers:
+    - memory: LRU with at most `capacity` vectors
+    - disk (optional): a sqlite3 database at `path`, vectors stored as float32 blobs
+
+    Not thread-safe, but it may be created in one thread and used in another.
+    '''
+    SQL_BATCH = 500  # parameters per query, below the sqlite limit
+
+    def __init__(self, path: str = None, capacity: int = 200000) -> None:
+        self._capacity = capacity
+        self._memory = OrderedDict()  # {(model digest, text hash): np.ndarray}
+        self._stats = {'memoryHits': 0, 'diskHits': 0, 'misses': 0}
+        self._db = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS embeddings ('
+                             'model TEXT, text BLOB, vector BLOB, PRIMARY KEY (model, text))')
+            self._db.commit()
+
+    @property
+    def getStats(self) -> dict:
+        '''
+        return the hit/miss counters of distinct texts and the hit rate
+        '''
+        result = dict(self._stats)
+        total = sum(self._stats.values())
+        hits = self._stats['memoryHits'] + self._stats['diskHits']
+        result['hitRate'] = hits / total if total else 0.0
+        return result
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    _digests = {}  # {model path: digest}, computed once per process
+    DIGEST_EXTENSION = '.sha256'  # digest file next to a model directory
+
+    @staticmethod
+    def modelDigest(path: str) -> str:
+        '''
+        return the sha256 of the relative names and contents of all files under a model directory,
+        kept in `<directory>.sha256` with the sizes and modification times of the files,
+        so the files are read again only when they change
+        '''
+        path = os.path.abspath(path)
+        digest = EmbeddingCache._digests.get(path, None)
+        if digest is not None:
+            return digest
+        files = EmbeddingCache.__listFiles(path)
+        stats = [os.stat(os.path.join(path, name)) for name in files]
+        stamp = hashlib.sha256(json.dumps([[name, stat.st_size, stat.st_mtime_ns]
+                                           for name, stat in zip(files, stats)]).encode()).hexdigest()
+        digestPath = path + EmbeddingCache.DIGEST_EXTENSION
+        try:
+            with open(digestPath) as fp:
+                stored = json.load(fp)
+            if stored['stamp'] == stamp:
+                digest = stored['digest']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # no digest file yet
+        if digest is None:
+            sha = hashlib.sha256()
+            for name in files:
+                sha.update(name.encode() + b'\x00')
+                with open(os.path.join(path, name), 'rb') as fp:
+                    for block in iter(lambda: fp.read(1 << 20), b''):
+                        sha.update(block)
+            digest = sha.hexdigest()
+            try:
+                tmpPath = f'{path}.{os.getpid()}{EmbeddingCache.DIGEST_EXTENSION}'  # not listed either
+                with open(tmpPath, 'w') as fp:
+                    json.dump({'stamp': stamp, 'digest': digest}, fp)
+                os.replace(tmpPath, digestPath)  # atomic, concurrent writers are safe
+            except OSError:
+                pass  # read-only model directory, the digest is computed once per process
+        EmbeddingCache._digests[path] = digest
+        return digest
+
+    @staticmethod
+    def __listFiles(path: str) -> list:
+        '''
+        return the relative names of the files under `path` in a fixed order, without digest files
+        '''
+        result = []
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.endswith(EmbeddingCache.DIGEST_EXTENSION):
+                    result.append(os.path.relpath(os.path.join(root, name), path))
+        return result
+
+    @staticmethod
+    def hashText(text: str) -> bytes:
+        return hashlib.sha1(text.encode()).digest()
+
+    def __remember(self, key: tuple, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._capacity:
+            self._memory.popitem(last=False)  # least recently used
+
+    def __loadFromDisk(self, digest: str, textHashes: list) -> dict:
+        result = {}
+        if self._db is None:
+            return result
+        for start in range(0, len(textHashes), EmbeddingCache.SQL_BATCH):
+            batch = textHashes[start:start + EmbeddingCache.SQL_BATCH]
+            rows = self._db.execute('SELECT text, vector FROM embeddings WHERE model = ? AND text IN '
+                                    f'({",".join("?" * len(batch))})', [digest] + batch)
+            for textHash, vector in rows:
+                result[textHash] = np.frombuffer(vector, dtype=np.float32)
+        return result
+
+    def __saveToDisk(self, digest: str, items: list):
+        if self._db is None:
+            return
+        self._db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)',
+                             [(digest, textHash, vector.tobytes()) for textHash, vector in items])
+        self._db.commit()
+
+    def embed(self, texts: list, digest: str, embedFunction) -> np.ndarray:
+        '''
+        return the embeddings of `texts` as a (len(texts), dim) float32 array
+        - `digest` (`str`): digest of the model, see `modelDigest`
+        - `embedFunction`: called once with the list of distinct missing texts,
+        returns their embeddings in order
+        '''
+        textHashes = [EmbeddingCache.hashText(text) for text in texts]
+        vectors = {}  # {text hash: np.ndarray}
+        missing = []  # text hashes
+        for textHash in dict.fromkeys(textHashes):  # distinct, in order
+            key = (digest, textHash)
+            vector = self._memory.get(key, None)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats['memoryHits'] += 1
+                vectors[textHash] = vector
+            else:
+                missing.append(textHash)
+        if len(missing):
+            for textHash, vector in self.__loadFromDisk(digest, missing).items():
+                self._stats['diskHits'] += 1
+                vectors[textHash] = vector
+                self.__remember((digest, textHash), vector)
+            missing = [textHash for textHash in missing if textHash not in vectors]
+        if len(missing):
+            self._stats['misses'] += len(missing)
+            textByHash = dict(zip(textHashes, texts))
+            computed = np.asarray(embedFunction([textByHash[textHash] for textHash in missing]),
+                                  dtype=np.float32)
+            # copy the rows, so evicted vectors do not keep the whole batch alive
+            items = [(textHash, vector.copy()) for textHash, vector in zip(missing, computed)]
+            for textHash, vector in items:
+                vectors[textHash] = vector
+                self.__remember((digest, textHash), vector)
+            self.__saveToDisk(digest, items)
+        if not len(texts):
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[textHash] for textHash in textHashes])
+
+    def clear(self):
+        '''
+        clear the memory tier, the disk tier is kept
+        '''
+        self._memory.clear()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -4,10 +4,16 @@ from tensorflow.keras import Model
 from tensorflow.keras.layers import Conv1D, MaxPool1D, Flatten, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.losses import binary_crossentropy
+import numpy as np
 
 
 class GCNModel:
-    def __init__(self, graphs=None, model=None):
+    '''
+    - `labels` (`list`): names of the vulnerabilities of a multi-label model,
+    the trunk is shared and there is one sigmoid output per label, one output if `None`
+    '''
+
+    def __init__(self, graphs=None, model=None, labels: list = None):
         self.k = 100
         self.layer_sizes = [256, 128, 1]
         self.activations = ["relu", "relu", "relu"]
@@ -15,6 +21,7 @@ class GCNModel:
         self.dense_units = [1024, 512]
         self.dropout_rate = 0.5
         self.learning_rate = 0.0005
+        self.labels = labels
 
         if model is not None:
             self.model = model
@@ -43,7 +50,7 @@ class GCNModel:
         x_out = Dropout(rate=self.dropout_rate)(x_out)
         x_out = Dense(units=self.dense_units[1], activation="relu")(x_out)
         x_out = Dropout(rate=self.dropout_rate)(x_out)
-        predictions = Dense(units=1, activation="sigmoid")(x_out)
+        predictions = Dense(units=self.outputs, activation="sigmoid")(x_out)
 
         model = Model(inputs=x_inp, outputs=predictions)
         return model
@@ -61,9 +68,72 @@ class GCNModel:
     def predict(self, generator):
         return self.model.predict(generator)
 
+    @staticmethod
+    def bucket(nodeCounts: list, edgeCounts: list = None, maxNodes: int = 8192, maxEdges: int = None, maxBatch: int = 256) -> list:
+        '''
+        group graph indices into batches of graphs with similar sizes
+
+        graphs are sorted by node count, a batch is closed before its padded size,
+        i.e. graphs * largest node count, exceeds `maxNodes`,
+        or its edge count exceeds `maxEdges`, or it holds `maxBatch` graphs,
+        a graph larger than the budget gets a batch of its own
+        '''
+        order = np.argsort(np.asarray(nodeCounts), kind='stable')
+        batches = []
+        batch = []
+        edges = 0
+        for index in order.tolist():
+            nodes = nodeCounts[index]  # largest so far, the order is ascending
+            graphEdges = edgeCounts[index] if edgeCounts is not None else 0
+            if len(batch) and ((len(batch) + 1) * nodes > maxNodes
+                               or (maxEdges is not None and edges + graphEdges > maxEdges)
+                               or len(batch) == maxBatch):
+                batches.append(batch)
+                batch = []
+                edges = 0
+            batch.append(index)
+            edges += graphEdges
+        if len(batch):
+            batches.append(batch)
+        return batches
+
+    def predictBucketed(self, graphs: list, maxNodes: int = 8192, maxEdges: int = None, maxBatch: int = 256,
+                        symmetric_normalization: bool = False, weighted: bool = True) -> np.ndarray:
+        '''
+        predict graphs in size buckets instead of one by one, see `bucket`,
+        return a (graphs, outputs) array in the order of `graphs`
+
+        padding nodes are masked, so the scores do not depend on the batching
+        '''
+        result = np.zeros((len(graphs), self.outputs), dtype=np.float32)
+        if not len(graphs):
+            return result
+        nodeCounts = [graph.number_of_nodes() for graph in graphs]
+        edgeCounts = [graph.number_of_edges() for graph in graphs] if maxEdges is not None else None
+        generator = PaddedGraphGenerator(graphs=graphs)
+        for batch in GCNModel.bucket(nodeCounts, edgeCounts, maxNodes, maxEdges, maxBatch):
+            flow = generator.flow([graphs[i] for i in batch],
+                                  batch_size=len(batch),
+                                  symmetric_normalization=symmetric_normalization,
+                                  weighted=weighted
+                                  )
+            result[batch] = self.model.predict(flow, verbose=0).reshape(len(batch), self.outputs)
+        return result
+
+    def predictLabels(self, generator) -> dict:
+        '''
+        return {label: scores} of a multi-label model
+        '''
+        y_hat = self.model.predict(generator).reshape(-1, self.outputs)
+        return {label: y_hat[:, i] for i, label in enumerate(self.labels)}
+
     def save(self, path):
         self.model.save(path)
 
+    @property
+    def outputs(self) -> int:
+        return len(self.labels) if self.labels else 1
+
     @property
     def metrics_names(self):
         return self.model.metrics_names
@@ -0,0 +1,84 @@
+'''
+Loaders for the arrays exported by `CFG.toArrays`, the production path without json and networkx
+'''
+from instructions.InstructionTable import InstructionTable
+import numpy as np
+import pandas as pd
+
+NODE_TYPE = 'basic block'
+EDGE_TYPE = '--'
+
+
+def checkArrays(arrays: dict):
+    '''
+    raise `ValueError` if the arrays do not describe a graph as `CFG.toArrays` does,
+    i.e. wrong lengths, node indices or token offsets out of range
+    '''
+    for name, array in arrays.items():
+        if array.ndim != 1:
+            raise ValueError(f'{name} is not a list')
+    nodes = len(arrays['nodeOffsets'])
+    edges = len(arrays['edgeFrom'])
+    if len(arrays['edgeTo']) != edges or len(arrays['edgeWeight']) != edges:
+        raise ValueError('edgeFrom, edgeTo and edgeWeight differ in length')
+    for name in ('edgeFrom', 'edgeTo'):
+        if edges and (arrays[name].min() < 0 or arrays[name].max() >= nodes):
+            raise ValueError(f'{name} out of range, {nodes} nodes')
+    if not np.isfinite(arrays['edgeWeight']).all():
+        raise ValueError('edgeWeight is not finite')
+    if len(np.unique(arrays['nodeOffsets'])) != nodes:
+        raise ValueError('nodeOffsets are not distinct')
+    tokenOffsets = arrays['tokenOffsets']
+    if len(tokenOffsets) != nodes + 1:
+        raise ValueError(f'tokenOffsets length is {len(tokenOffsets)}, not {nodes + 1}')
+    if tokenOffsets[0] != 0 or tokenOffsets[-1] != len(arrays['tokens']) or (np.diff(tokenOffsets) < 0).any():
+        raise ValueError('tokenOffsets do not split tokens')
+
+
+def getNodeTexts(arrays: dict) -> list:
+    '''
+    return the normalized opcode text of each node, same as `Dataset.jsonToNx` features
+    '''
+    table = InstructionTable.getDecodeTable()
+    names = [opcodeObject.name for _, opcodeObject, _ in table]
+    tokens = arrays['tokens'].tolist()
+    tokenOffsets = arrays['tokenOffsets'].tolist()
+    return [' '.join([names[t] for t in tokens[start:end]])
+            for start, end in zip(tokenOffsets, tokenOffsets[1:])]
+
+
+def getEdges(arrays: dict, selfLoops: bool = True) -> tuple:
+    '''
+    return (source, target, weight) node indices and weights,
+    with a self-loop of weight 1 on each node and duplicated edges dropped,
+    the last weight wins, as in `Dataset.jsonToNx`
+    '''
+    source = arrays['edgeFrom']
+    target = arrays['edgeTo']
+    weight = arrays['edgeWeight']
+    if selfLoops:
+        loops = np.arange(len(arrays['nodeOffsets']), dtype=source.dtype)
+        source = np.concatenate([source, loops])
+        target = np.concatenate([target, loops])
+        weight = np.concatenate([weight, np.ones(len(loops), dtype=weight.dtype)])
+    keys = source.astype(np.int64) * max(len(arrays['nodeOffsets']), 1) + target
+    # index of the last occurrence of each key, in input order
+    _, reversedIndices = np.unique(keys[::-1], return_index=True)
+    keep = np.sort(len(keys) - 1 - reversedIndices)
+    return source[keep], target[keep], weight[keep]
+
+
+def toStellarGraph(arrays: dict, nodeFeatures: np.ndarray, weighted: bool = True):
+    '''
+    build the `StellarDiGraph` of one graph
+    - `nodeFeatures` (`np.ndarray`): one row of features per node, in `nodeOffsets` order
+    '''
+    from stellargraph import StellarDiGraph
+    nodeOffsets = arrays['nodeOffsets']
+    source, target, weight = getEdges(arrays)
+    edges = pd.DataFrame({'source': nodeOffsets[source],
+                          'target': nodeOffsets[target]})
+    if weighted:
+        edges['weight'] = weight
+    nodes = pd.DataFrame(nodeFeatures, index=nodeOffsets)
+    return StellarDiGraph(nodes={NODE_TYPE: nodes}, edges={EDGE_TYPE: edges})
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+
+
+class ResultStore:
+    '''
+    public class
+
+    Append-only store of scores keyed by (contract key, model digest, vulnerability),
+    one json line per score in a single file.
+
+    Each `add` is one `write` on a file opened in append mode, so a crash loses at most
+    the last partial line, which is skipped when loading, and a run can resume from the file.
+    '''
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._scores = {}  # {(contract, model, vul): score}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__load()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __load(self):
+        if not os.path.exists(self._path):
+            return
+        with open(self._path, 'rb') as fp:
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                    key = (record['contract'], record['model'], record['vul'])
+                    self._scores[key] = record['score']
+                except (ValueError, KeyError, TypeError):
+                    continue  # truncated by a crash
+
+    @staticmethod
+    def hashGraph(nodeOffsets: list, texts: list, edges: list) -> str:
+        '''
+        return the key of a model input graph, independent of its storage
+        - `edges` (`list`): (from offset, to offset, weight), self-loops included
+        '''
+        canonical = json.dumps([[int(o) for o in nodeOffsets], list(texts),
+                                sorted((int(u), int(v), float(w)) for u, v, w in edges)])
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, contract: str, model: str, vul: str) -> float:
+        return self._scores.get((contract, model, vul), None)
+
+    def getScores(self, contracts: list, model: str, vul: str) -> list:
+        return [self._scores.get((contract, model, vul), None) for contract in contracts]
+
+    def missing(self, contracts: list, model: str, vul: str) -> list:
+        '''
+        return the indices of the contracts without a score, the first index of each contract key
+        '''
+        result = []
+        seen = set()
+        for i, contract in enumerate(contracts):
+            if contract in seen or (contract, model, vul) in self._scores:
+                continue
+            seen.add(contract)
+            result.append(i)
+        return result
+
+    def add(self, contracts: list, model: str, vul: str, scores: list):
+        '''
+        record the scores of contracts, appended to the file in a single write
+        '''
+        lines = []
+        for contract, score in zip(contracts, scores):
+            score = float(score)
+            self._scores[(contract, model, vul)] = score
+            lines.append(json.dumps({'contract': contract, 'model': model,
+                                     'vul': vul, 'score': score}))
+        if not len(lines):
+            return
+        data = ('\n'.join(lines) + '\n').encode()
+        fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size and not self.__endsWithNewline(size):
+                data = b'\n' + data  # terminate the line truncated by a crash
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __endsWithNewline(self, size: int) -> bool:
+        with open(self._path, 'rb') as fp:
+            fp.seek(size - 1)
+            return fp.read(1) == b'\n'
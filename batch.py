@@ -0,0 +1,271 @@
+'''
+Batch analysis of many contracts across a process pool.
+
+    python batch.py contracts/ -o results.jsonl
+    python batch.py contracts.csv --field bytecode --id-field address -o results.jsonl
+    python batch.py contracts.jsonl --workers 16 --timeout 120 --memory 4096 -o results.jsonl
+    python batch.py contracts.jsonl --cache cache/analysis -o results.jsonl
+
+Inputs are directories of hex files, hex files, CSV files or JSONL files.
+Every output line is one record: `{"id", "ok", "seconds", "cfg"}` on success,
+where `cfg` follows the EtherSolve format of `CFG.toJson`,
+plus `budget` (`ExplorationBudget.getStats`) when an exploration budget is set,
+or `{"id", "ok", "seconds", "error"}` on failure.
+'''
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+from cfg.FSG import FSG
+from cfg.Budget import ExplorationBudget
+from cfg.AnalysisCache import AnalysisCache
+from collections import deque
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+HEX_EXTENSIONS = ('.hex', '.bin', '.txt', '.evm')
+GRAPHS = list(FSG.GRAPHS)
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+def buildGraph(binary: str, graph: str = 'combined', loopLimit: int = 2, maximized: bool = False,
+               budget: ExplorationBudget = None, exploreWorkers: int = None) -> CFG:
+    '''
+    Contract -> disassemble -> CFG -> API sub-graph -> combined graph
+    - `graph` (`str`): which graph to return, one of `GRAPHS`
+    - `budget` (`ExplorationBudget`): limits of the CFG exploration, the graph is partial when exhausted
+    - `exploreWorkers` (`int`): processes exploring the functions of the contract, see `CFG.buildCFG`
+    '''
+    contract = Contract(binary)
+    code = Disassembler.disassemble(contract.runtimeBinary)
+    fsg = FSG(code)
+    if code.getSize:
+        fsg.buildCFG(loopLimit, maximized, budget, exploreWorkers)
+    return fsg.getGraph(graph)
+
+
+def analyze(binary: str, graph: str = 'combined', loopLimit: int = 2, maximized: bool = False,
+            showOrphanBlocks: bool = False, simplified: bool = False, semantic: bool = False,
+            normalized: bool = False, budget: ExplorationBudget = None, exploreWorkers: int = None,
+            cache: AnalysisCache = None) -> dict:
+    '''
+    `buildGraph` -> json
+    - `cache` (`AnalysisCache`): if given, byte-identical runtime binaries are analysed once
+    '''
+    if cache is not None:
+        return cache.get(binary, loopLimit, maximized, showOrphanBlocks, simplified, semantic,
+                         graph, normalized, budget, exploreWorkers)[1]
+    return buildGraph(binary, graph, loopLimit, maximized, budget, exploreWorkers).toJson(
+        showOrphanBlocks, simplified, semantic, normalized)
+
+
+_caches = {}  # {directory: AnalysisCache} of this process
+
+
+def getCache(directory: str) -> AnalysisCache:
+    '''
+    return the cache of this process on `directory`, the disk tier is shared by the workers
+    '''
+    if directory not in _caches:
+        _caches[directory] = AnalysisCache(directory)
+    return _caches[directory]
+
+
+def readRecords(paths: list, field: str = 'bytecode', idField: str = 'id'):
+    '''
+    yield (id, binary) from directories, hex files, CSV files and JSONL files, streaming
+    '''
+    csv.field_size_limit(sys.maxsize)
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(HEX_EXTENSIONS):
+                        filename = os.path.join(root, name)
+                        yield os.path.relpath(filename, path), readHex(filename)
+        elif path.endswith('.csv'):
+            with open(path, newline='') as fp:
+                for index, row in enumerate(csv.DictReader(fp)):
+                    yield row.get(idField, f'{path}:{index}'), row[field]
+        elif path.endswith(('.jsonl', '.ndjson')):
+            with open(path) as fp:
+                for index, line in enumerate(fp):
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    yield record.get(idField, f'{path}:{index}'), record[field]
+        else:
+            yield path, readHex(path)
+
+
+def readHex(filename: str) -> str:
+    with open(filename) as fp:
+        return fp.read().strip()
+
+
+def _initWorker(memoryLimit: int = None):
+    '''
+    cap the address space of the worker, in MiB (Unix only)
+    '''
+    if memoryLimit is None:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memoryLimit * 2**20
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _onTimeout(signum, frame):
+    raise TaskTimeout('task timed out')
+
+
+def _analyzeRecord(record: tuple, options: dict, timeout: int = None, budgetOptions: dict = None,
+                   cacheDirectory: str = None) -> dict:
+    '''
+    analyze one record, never raise, the error is part of the result
+    '''
+    identifier, binary = record
+    result = {'id': identifier}
+    budget = ExplorationBudget(**budgetOptions) if budgetOptions else None
+    start = time.perf_counter()
+    alarm = timeout is not None and hasattr(signal, 'SIGALRM')  # Unix only
+    if alarm:
+        signal.signal(signal.SIGALRM, _onTimeout)
+        signal.alarm(timeout)
+    try:
+        cache = getCache(cacheDirectory) if cacheDirectory is not None else None
+        # the emulator prints its errors, keep them out of the JSON lines on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            result['cfg'] = analyze(binary, budget=budget, cache=cache, **options)
+        result['ok'] = True
+        if budget is not None:
+            result['budget'] = budget.getStats
+    except Exception as e:  # MemoryError and TaskTimeout included
+        result['ok'] = False
+        result['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        if alarm:
+            signal.alarm(0)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run(records, output, options: dict, workers: int = None, timeout: int = None,
+        memoryLimit: int = None, maxTasksPerChild: int = 100, budgetOptions: dict = None,
+        cacheDirectory: str = None) -> dict:
+    '''
+    analyze the records on a process pool, write one json line per record to `output`
+    in input order, return the counters
+    - `budgetOptions` (`dict`): parameters of the `ExplorationBudget` of each record
+    - `cacheDirectory` (`str`): disk tier of the `AnalysisCache` of the workers, no cache if `None`
+    '''
+    workers = workers or os.cpu_count()
+    counters = {'ok': 0, 'failed': 0, 'partial': 0}
+
+    def write(result: dict):
+        counters['ok' if result['ok'] else 'failed'] += 1
+        if not result.get('budget', {}).get('complete', True):
+            counters['partial'] += 1
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+
+    if workers <= 1:
+        _initWorker(memoryLimit)
+        for record in records:
+            write(_analyzeRecord(record, options, timeout, budgetOptions, cacheDirectory))
+        return counters
+    window = workers * 4  # bound the records in flight, the input is streamed
+    with multiprocessing.Pool(workers, _initWorker, (memoryLimit,), maxTasksPerChild) as pool:
+        pending = deque()
+        for record in records:
+            pending.append(pool.apply_async(
+                _analyzeRecord, (record, options, timeout, budgetOptions, cacheDirectory)))
+            if len(pending) >= window:
+                write(pending.popleft().get())
+        while len(pending):
+            write(pending.popleft().get())
+    return counters
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='analyze contracts in batch')
+    parser.add_argument('inputs', nargs='+',
+                        help='directories, hex files, .csv or .jsonl files')
+    parser.add_argument('-o', '--output', help='output JSONL file, stdout if omitted')
+    parser.add_argument('--field', default='bytecode',
+                        help='bytecode column (CSV) or key (JSONL)')
+    parser.add_argument('--id-field', default='id',
+                        help='identifier column (CSV) or key (JSONL)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of processes, all cores by default')
+    parser.add_argument('--timeout', type=int, default=None,
+                        help='seconds allowed per contract')
+    parser.add_argument('--memory', type=int, default=None,
+                        help='memory limit per worker in MiB')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='CFG exploration deadline, the graph is partial when reached')
+    parser.add_argument('--max-instructions', type=int, default=None,
+                        help='executed instructions allowed per CFG exploration')
+    parser.add_argument('--max-states', type=int, default=None,
+                        help='forked states allowed per CFG exploration')
+    parser.add_argument('--max-memory', type=int, default=None,
+                        help='resident memory in MiB allowed during CFG exploration')
+    parser.add_argument('--graph', choices=GRAPHS, default='combined')
+    parser.add_argument('--cache', default=None,
+                        help='directory of the analysis cache, duplicated contracts are analysed once')
+    parser.add_argument('--loop-limit', type=int, default=2)
+    parser.add_argument('--maximized', action='store_true')
+    parser.add_argument('--explore-workers', type=int, default=None,
+                        help='processes exploring the functions of each contract, needs --workers 1')
+    parser.add_argument('--show-orphan-blocks', action='store_true')
+    parser.add_argument('--simplified', action='store_true')
+    parser.add_argument('--semantic', action='store_true')
+    parser.add_argument('--normalized', action='store_true',
+                        help='add the normalized opcodes used by Dataset to the nodes')
+    args = parser.parse_args(argv)
+    if args.explore_workers is not None and args.workers != 1:
+        parser.error('--explore-workers needs --workers 1, pool workers can not start processes')
+
+    options = {'graph': args.graph,
+               'loopLimit': args.loop_limit,
+               'maximized': args.maximized,
+               'exploreWorkers': args.explore_workers,
+               'showOrphanBlocks': args.show_orphan_blocks,
+               'simplified': args.simplified,
+               'semantic': args.semantic,
+               'normalized': args.normalized}
+    budgetOptions = {'seconds': args.max_seconds,
+                     'maxInstructions': args.max_instructions,
+                     'maxStates': args.max_states,
+                     'maxMemory': args.max_memory and args.max_memory * 2**20}
+    if all(value is None for value in budgetOptions.values()):
+        budgetOptions = None
+    records = readRecords(args.inputs, args.field, args.id_field)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        counters = run(records, output, options, args.workers,
+                       args.timeout, args.memory, budgetOptions=budgetOptions,
+                       cacheDirectory=args.cache)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+    total = counters['ok'] + counters['failed']
+    print(f"{total} contracts, {counters['ok']} ok, {counters['failed']} failed, {counters['partial']} partial, "
+          f"{total / seconds if seconds else 0:.1f} contracts/sec", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
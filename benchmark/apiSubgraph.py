@@ -0,0 +1,67 @@
+'''
+Time of `FSG.generateAPIsubgraph`, block by block removal against contraction,
+run from the repository root:
+
+    python -m benchmark.apiSubgraph [hex files or directories] [--maximized] [--repeat N]
+
+The two API subgraphs of each contract are compared edge by edge.
+'''
+import argparse
+from benchmark.common import loadBinaries, syntheticBinaries, measure
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+from cfg.FSG import FSG
+
+METHODS = {'removal': False, 'contraction': True}
+
+
+def edgeSet(cfg: CFG) -> list:
+    '''
+    return the sorted edges as [from, to, type, weight]
+    '''
+    return sorted([e.getFrom.getStartOffset, e.getTo.getStartOffset, e.getType, e.getWeight]
+                  for e in cfg.getEdges)
+
+
+def buildGraphs(binaries: list, loopLimit: int, maximized: bool) -> list:
+    graphs = []
+    for binary in binaries:
+        code = Disassembler.disassemble(Contract(binary).runtimeBinary)
+        if not code.getSize:
+            continue
+        fsg = FSG(code)
+        fsg.buildCFG(loopLimit, maximized)
+        graphs.append(fsg)
+    return graphs
+
+
+def run(binaries: list, loopLimit: int = 2, maximized: bool = False, repeat: int = 1) -> bool:
+    graphs = buildGraphs(binaries, loopLimit, maximized)
+    blocks = sum(len(fsg.getNodes) for fsg in graphs)
+    edges = sum(len(fsg.getEdges) for fsg in graphs)
+    print(f'{len(graphs)} contracts, {blocks} blocks, {edges} edges')
+    mismatches = 0
+    for fsg in graphs:
+        expected, actual = (edgeSet(fsg.generateAPIsubgraph(contraction=contraction))
+                            for contraction in METHODS.values())
+        if expected != actual:
+            mismatches += 1
+            print(f'Warning: {fsg.getCode.getSize} bytes contract, '
+                  f'{len(expected)} edges by removal, {len(actual)} by contraction')
+    for name, contraction in METHODS.items():
+        seconds = measure(lambda fsg: fsg.generateAPIsubgraph(contraction=contraction), graphs, repeat)
+        print(f'{name:>12}: {seconds:8.3f}s')
+    print(f'{mismatches} mismatches')
+    return mismatches == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--loop-limit', type=int, default=2)
+    parser.add_argument('--maximized', action='store_true')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+    binaries = loadBinaries(args.paths) if args.paths else syntheticBinaries(5, 4096)
+    run(binaries, args.loop_limit, args.maximized, args.repeat)
@@ -0,0 +1,65 @@
+'''
+Peak memory and time of `CFG.buildCFG`, with copy-on-write states and
+with the former deep-copied states, run from the repository root:
+
+    python -m benchmark.cfgMemory [hex files or directories] [--maximized]
+'''
+import argparse
+import time
+import tracemalloc
+from copy import deepcopy
+from benchmark.common import loadBinaries, syntheticBinaries
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+from evm.State import State
+
+
+def deepcopyState(state: State) -> State:
+    '''
+    `State.copy` before copy-on-write snapshots
+    '''
+    return State(state.code, state.pc, deepcopy(state.stack), state.insStack.copy(),
+                 deepcopy(state.memory), deepcopy(state.storage), state.gas)
+
+
+def profile(codes: list, loopLimit: int, maximized: bool) -> tuple:
+    '''
+    return (peak traced memory in bytes, seconds)
+    '''
+    peak = 0
+    seconds = 0.0
+    tracemalloc.start()
+    for code in codes:
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        cfg = CFG(code)
+        cfg.buildCFG(loopLimit, maximized)
+        seconds += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])  # largest single build
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def run(binaries: list, loopLimit: int = 2, maximized: bool = False):
+    runtimeBinaries = [Contract(b).runtimeBinary for b in binaries]
+    print(f'{len(binaries)} contracts')
+    copyOnWrite = State.copy
+    for name, copy in (('deepcopy', deepcopyState), ('copy-on-write', copyOnWrite)):
+        State.copy = copy
+        try:
+            codes = [Disassembler.disassemble(b) for b in runtimeBinaries]
+            peak, seconds = profile(codes, loopLimit, maximized)
+        finally:
+            State.copy = copyOnWrite
+        print(f'{name:>14}: peak {peak / 2**20:8.2f} MiB, {seconds:8.2f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--loop-limit', type=int, default=2)
+    parser.add_argument('--maximized', action='store_true')
+    args = parser.parse_args()
+    binaries = loadBinaries(args.paths) if args.paths else syntheticBinaries(5, 4096)
+    run(binaries, args.loop_limit, args.maximized)
@@ -0,0 +1,65 @@
+'''
+Time of `CFG.buildCFG` with one BFS and with the functions explored on several processes,
+run from the repository root:
+
+    python -m benchmark.cfgParallel [hex files or directories] [--workers 1 2 4] [--maximized]
+
+Without files, contracts of many branchy functions are generated, see `dispatcherBinaries`.
+The critical path is the CPU time of this process plus the one of the slowest worker,
+the wall time with a core per worker, so the speedup shows on a machine with fewer cores too.
+The parallel edges must be a superset of the single BFS, the graphs missing an edge are counted.
+'''
+import argparse
+import os
+import time
+from benchmark.common import loadBinaries, dispatcherBinaries
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+
+
+def build(codes: list, loopLimit: int, maximized: bool, workers: int = None) -> tuple:
+    '''
+    return (edge sets, wall seconds, critical path seconds)
+    '''
+    edgeSets = []
+    wall = 0.0
+    critical = 0.0
+    for code in codes:
+        cfg = CFG(code)
+        start, cpu = time.perf_counter(), time.process_time()
+        cfg.buildCFG(loopLimit, maximized, workers=workers)
+        wall += time.perf_counter() - start
+        critical += time.process_time() - cpu + max(cfg.getWorkerSeconds or [0])
+        edgeSets.append({(e.getFrom.getName, e.getTo.getName) for e in cfg.getEdges})
+    return edgeSets, wall, critical
+
+
+def run(binaries: list, workersList: list, loopLimit: int = 2, maximized: bool = False) -> bool:
+    runtimeBinaries = [Contract(b).runtimeBinary for b in binaries]
+    runtimeBinaries = [b for b in runtimeBinaries if Disassembler.disassemble(b).getSize]
+    print(f'{len(runtimeBinaries)} contracts, {os.cpu_count()} cores')
+    # fresh instructions for each build, the executions leave their jump destinations in them
+    expected, wall, single = build([Disassembler.disassemble(b) for b in runtimeBinaries], loopLimit, maximized)
+    print(f'{"single BFS":>12}: {wall:8.3f}s wall, {single:8.3f}s critical path')
+    mismatches = 0
+    for workers in workersList:
+        actual, wall, critical = build([Disassembler.disassemble(b) for b in runtimeBinaries],
+                                       loopLimit, maximized, workers)
+        missing = sum(not e <= a for e, a in zip(expected, actual))
+        extra = sum(len(a - e) for e, a in zip(expected, actual))
+        mismatches += missing
+        print(f'{f"{workers} workers":>12}: {wall:8.3f}s wall, {critical:8.3f}s critical path, '
+              f'{single / critical:5.2f}x, {extra} extra edges, {missing} graphs missing edges')
+    return mismatches == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--loop-limit', type=int, default=2)
+    parser.add_argument('--maximized', action='store_true')
+    args = parser.parse_args()
+    binaries = loadBinaries(args.paths) if args.paths else dispatcherBinaries()
+    run(binaries, args.workers, args.loop_limit, args.maximized)
@@ -0,0 +1,89 @@
+'''
+Regression harness for CFG recovery, run from the repository root.
+
+Record the edge sets of a corpus, then check later versions against them:
+
+    python -m benchmark.cfgRegression record edges.json [hex files or directories]
+    python -m benchmark.cfgRegression check edges.json [hex files or directories]
+
+Each contract is built with `maximized` off and on.
+'''
+import argparse
+import hashlib
+import json
+import sys
+import time
+from benchmark.common import loadBinaries, syntheticBinaries
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+
+MODES = {'default': False, 'maximized': True}
+
+
+def edgeSet(cfg: CFG) -> list:
+    '''
+    return the sorted edges as [from, to, type, weight]
+    '''
+    edges = [[e.getFrom.getStartOffset, e.getTo.getStartOffset, e.getType, e.getWeight]
+             for e in cfg.getEdges]
+    return sorted(edges)
+
+
+def collect(binaries: list, loopLimit: int = 2) -> tuple:
+    '''
+    return ({binary hash: {mode: edges}}, seconds spent in `buildCFG`)
+    '''
+    result = {}
+    seconds = 0.0
+    for binary in binaries:
+        runtimeBinary = Contract(binary).runtimeBinary
+        key = hashlib.sha256(runtimeBinary.encode()).hexdigest()
+        result[key] = {}
+        for mode, maximized in MODES.items():
+            cfg = CFG(Disassembler.disassemble(runtimeBinary))
+            start = time.perf_counter()
+            cfg.buildCFG(loopLimit, maximized)
+            seconds += time.perf_counter() - start
+            result[key][mode] = edgeSet(cfg)
+    return result, seconds
+
+
+def record(filename: str, binaries: list, loopLimit: int = 2):
+    result, seconds = collect(binaries, loopLimit)
+    with open(filename, 'w') as fp:
+        json.dump(result, fp)
+    print(f'recorded {len(result)} contracts in {seconds:.2f}s')
+
+
+def check(filename: str, binaries: list, loopLimit: int = 2) -> bool:
+    with open(filename) as fp:
+        expected = json.load(fp)
+    actual, seconds = collect(binaries, loopLimit)
+    failures = 0
+    for key, modes in actual.items():
+        if key not in expected:
+            print(f'Warning: {key} not recorded, skipping...')
+            continue
+        for mode, edges in modes.items():
+            if edges != expected[key][mode]:
+                failures += 1
+                missing = len([e for e in expected[key][mode] if e not in edges])
+                added = len([e for e in edges if e not in expected[key][mode]])
+                print(f'{key} ({mode}): {missing} edges missing, {added} edges added')
+    print(f'checked {len(actual)} contracts in {seconds:.2f}s, {failures} mismatches')
+    return failures == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['record', 'check'])
+    parser.add_argument('edges')
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--loop-limit', type=int, default=2)
+    args = parser.parse_args()
+    binaries = loadBinaries(args.paths) if args.paths else syntheticBinaries(5, 4096)
+    if args.command == 'record':
+        record(args.edges, binaries, args.loop_limit)
+    elif not check(args.edges, binaries, args.loop_limit):
+        sys.exit(1)
@@ -0,0 +1,99 @@
+import os
+import random
+import time
+
+HEX_EXTENSIONS = ('.hex', '.bin', '.txt', '.evm')
+
+
+def loadBinaries(paths: list) -> list:
+    '''
+    load hex bytecode strings from files, directories are walked recursively
+    '''
+    binaries = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(HEX_EXTENSIONS):
+                        binaries.append(readBinary(os.path.join(root, name)))
+        else:
+            binaries.append(readBinary(path))
+    return binaries
+
+
+def readBinary(filename: str) -> str:
+    with open(filename) as fp:
+        binary = fp.read().strip()
+    return binary[2:] if binary.startswith('0x') else binary
+
+
+def syntheticBinaries(count: int = 20, size: int = 24576, seed: int = 0) -> list:
+    '''
+    random bytecodes of `size` bytes, used when no corpus is given
+    '''
+    rnd = random.Random(seed)
+    return [bytes(rnd.getrandbits(8) for _ in range(size)).hex() for _ in range(count)]
+
+
+def dispatcherBinaries(count: int = 5, functions: int = 32, depth: int = 32, seed: int = 0) -> list:
+    '''
+    runtime bytecodes of a selector dispatcher over `functions` functions,
+    each a chain of `depth` branches on the call data whose paths end in different states,
+    used to measure the parallel exploration
+    '''
+    rnd = random.Random(seed)
+    return [_dispatcher([rnd.getrandbits(32) for _ in range(functions)], depth) for _ in range(count)]
+
+
+def _dispatcher(selectors: list, depth: int) -> str:
+    # (opcode, operand size, operand) or a label, operands that are labels are resolved to their offsets
+    program = [(0x60, 1, 0), (0x35, 0, None), (0x60, 1, 0xe0), (0x1c, 0, None)]  # selector = calldata[0] >> 224
+    for k, selector in enumerate(selectors):
+        # DUP1 PUSH4 selector EQ PUSH2 function JUMPI
+        program += [(0x80, 0, None), (0x63, 4, selector), (0x14, 0, None), (0x61, 2, f'f{k}'), (0x57, 0, None)]
+    program += [(0x60, 1, 0), (0x80, 0, None), (0xfd, 0, None)]  # PUSH1 0 DUP1 REVERT
+    for k in range(len(selectors)):
+        program += [f'f{k}', (0x5b, 0, None), (0x60, 1, 0)]  # JUMPDEST PUSH1 0, a counter on the stack
+        for j in range(depth):
+            taken, join = f'f{k}t{j}', f'f{k}j{j}'
+            # PUSH1 4+j CALLDATALOAD PUSH1 1 AND PUSH2 taken JUMPI
+            program += [(0x60, 1, 4 + j), (0x35, 0, None), (0x60, 1, 1), (0x16, 0, None),
+                        (0x61, 2, taken), (0x57, 0, None)]
+            # storage[j] += 1, counter += 2: PUSH1 j SLOAD PUSH1 1 ADD PUSH1 j SSTORE PUSH1 2 ADD PUSH2 join JUMP
+            program += [(0x60, 1, j), (0x54, 0, None), (0x60, 1, 1), (0x01, 0, None), (0x60, 1, j),
+                        (0x55, 0, None), (0x60, 1, 2), (0x01, 0, None), (0x61, 2, join), (0x56, 0, None)]
+            # counter += 1: JUMPDEST PUSH1 1 ADD
+            program += [taken, (0x5b, 0, None), (0x60, 1, 1), (0x01, 0, None)]
+            # the counters differ by path, so the states too: JUMPDEST DUP1 PUSH1 0x80 MSTORE
+            program += [join, (0x5b, 0, None), (0x80, 0, None), (0x60, 1, 0x80), (0x52, 0, None)]
+        program += [(0x50, 0, None), (0x00, 0, None)]  # POP STOP
+    labels = {}
+    offset = 0
+    for item in program:
+        if isinstance(item, str):
+            labels[item] = offset
+        else:
+            offset += 1 + item[1]
+    result = []
+    for item in program:
+        if isinstance(item, str):
+            continue
+        opcode, size, operand = item
+        result.append(f'{opcode:02x}')
+        if size:
+            result.append(f'{labels.get(operand, operand):0{size * 2}x}')
+    return ''.join(result)
+
+
+def measure(function, items: list, repeat: int = 3) -> float:
+    '''
+    return the best wall-clock time in seconds of applying `function` to all items
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -0,0 +1,41 @@
+'''
+Disassembler throughput, run from the repository root:
+
+    python -m benchmark.disassembler [hex files or directories] [--repeat N]
+'''
+import argparse
+from benchmark.common import loadBinaries, syntheticBinaries, measure
+from contract.Disassembler import Disassembler
+
+MODES = {
+    'hex': Disassembler.disassembleHex,
+    'bytes': Disassembler.disassemble,
+    'columnar': Disassembler.disassembleColumnar,
+}
+
+
+def sameOutput(binary: str) -> bool:
+    expected = [str(i) for _, i in Disassembler.disassembleHex(binary)]
+    actual = [str(i) for _, i in Disassembler.disassemble(binary)]
+    columnar = [str(i) for _, i in Disassembler.disassembleColumnar(binary)]
+    return expected == actual == columnar
+
+
+def run(binaries: list, repeat: int = 3):
+    totalBytes = sum(len(b) // 2 for b in binaries)
+    print(f'{len(binaries)} contracts, {totalBytes / 1e6:.2f} MB')
+    if not all(sameOutput(b) for b in binaries):
+        print('Warning: disassembly modes differ')
+    for name, function in MODES.items():
+        seconds = measure(function, binaries, repeat)
+        print(f'{name:>8}: {len(binaries) / seconds:10.1f} contracts/sec '
+              f'{totalBytes / 1e6 / seconds:8.2f} MB/sec')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    binaries = loadBinaries(args.paths) if args.paths else syntheticBinaries()
+    run(binaries, args.repeat)
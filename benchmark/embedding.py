@@ -0,0 +1,83 @@
+'''
+Block embedding throughput of the USE model, per graph against batched, run from the repository root:
+
+    python -m benchmark.embedding models/SC2/<vul>/USE/ [hex files or directories]
+        [--dataset dataset.csv] [--limit N] [--batch-sizes 256 1024 4096] [--repeat N]
+
+needs tensorflow and tensorflow_hub
+'''
+import argparse
+import numpy as np
+from benchmark.common import loadBinaries, syntheticBinaries, measure
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from cfg.CFG import CFG
+import Embedding
+import GraphArrays
+
+
+def featuresFromBinaries(binaries: list) -> list:
+    featureLists = []
+    for binary in binaries:
+        code = Disassembler.disassemble(Contract(binary).runtimeBinary)
+        cfg = CFG(code)
+        if code.getSize:
+            cfg.buildCFG()
+        featureLists.append(GraphArrays.getNodeTexts(cfg.toArrays()))
+    return featureLists
+
+
+def featuresFromDataset(path: str, limit: int) -> list:
+    from Dataset import Dataset
+    dataset = Dataset(path, streaming=True)
+    featureLists = []
+    for _, _, features in dataset.graphs:
+        if len(featureLists) == limit:
+            break
+        featureLists.append(features)
+    return featureLists
+
+
+def run(usePath: str, featureLists: list, batchSizes: list, repeat: int = 1):
+    import tensorflow as tf
+    from test import getUSEmodel
+    USEmodel = getUSEmodel(usePath)
+
+    def call(texts):
+        return np.array(USEmodel(tf.convert_to_tensor(texts)))
+
+    def perGraph(featureLists):
+        return [call(features) for features in featureLists]
+
+    blocks = sum(len(features) for features in featureLists)
+    distinct = len({text for features in featureLists for text in features})
+    print(f'{len(featureLists)} graphs, {blocks} blocks, {distinct} distinct')
+    expected = perGraph(featureLists)
+    seconds = measure(perGraph, [featureLists], repeat)
+    print(f'{"per graph":>14}: {blocks / seconds:10.1f} blocks/sec')
+    for batchSize in batchSizes:
+        def batched(featureLists):
+            return Embedding.embedGraphs(
+                featureLists, lambda texts: Embedding.embedInBatches(texts, call, batchSize))
+        actual = batched(featureLists)
+        if not all(np.allclose(e, a, atol=1e-5) for e, a in zip(expected, actual)):
+            print(f'Warning: batch size {batchSize} differs from per graph embedding')
+        seconds = measure(batched, [featureLists], repeat)
+        print(f'{f"batch {batchSize}":>14}: {blocks / seconds:10.1f} blocks/sec')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('model', help='USE model directory')
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--dataset', help='dataset CSV, used instead of the hex files')
+    parser.add_argument('--limit', type=int, default=1000, help='graphs read from the dataset')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[256, 1024, 4096])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+    if args.dataset:
+        featureLists = featuresFromDataset(args.dataset, args.limit)
+    else:
+        binaries = loadBinaries(args.paths) if args.paths else syntheticBinaries()
+        featureLists = featuresFromBinaries(binaries)
+    run(args.model, featureLists, args.batch_sizes, args.repeat)
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from contract.Contract import Contract
+from contract.Disassembler import Disassembler
+from evm.Code import Code
+from cfg.FSG import FSG
+from cfg.Budget import ExplorationBudget
+import hashlib
+import json
+import os
+
+
+class AnalysisCache:
+    '''
+    public class
+
+    Content-addressed cache of the disassembled `Code` and the `CFG.toJson` result,
+    keyed by the hash of `Contract.runtimeBinary` and the options, so byte-identical clones are analysed once.
+    Graphs cut short by an `ExplorationBudget` are not cached.
+
+    Two tiers:
+    - memory: LRU of (`Code`, json) with at most `capacity` entries
+    - disk (optional): one json file per entry under `directory`,
+    the `Code` is disassembled again on a disk hit
+
+    The returned `Code` is shared between callers and must be treated as read-only.
+    '''
+    EXTENSION = '.json'
+
+    def __init__(self, directory: str = None, capacity: int = 1024) -> None:
+        self._directory = directory
+        self._capacity = capacity
+        self._memory = OrderedDict()  # {entry key: (Code, dict)}
+        self._stats = {'memoryHits': 0, 'diskHits': 0, 'misses': 0}
+        if directory is not None and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def getStats(self) -> dict:
+        '''
+        return the hit/miss counters and the hit rate
+        '''
+        result = dict(self._stats)
+        total = sum(self._stats.values())
+        hits = self._stats['memoryHits'] + self._stats['diskHits']
+        result['hitRate'] = hits / total if total else 0.0
+        return result
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    @staticmethod
+    def hashBinary(runtimeBinary: str) -> str:
+        return hashlib.sha256(runtimeBinary.lower().encode()).hexdigest()
+
+    @staticmethod
+    def __entryKey(binaryHash: str, loopLimit: int, maximized: bool, showOrphanBlocks: bool, simplified: bool,
+                   semantic: bool, graph: str, normalized: bool, workers: int = None) -> str:
+        options = [loopLimit, maximized, showOrphanBlocks, simplified, semantic, normalized]
+        entryKey = binaryHash + '-' + ''.join(str(int(o)) for o in options) + '-' + graph
+        if workers is not None:
+            # the parallel exploration adds edges of its own, see `CFG.buildCFG`
+            entryKey += f'-w{workers}'
+        return entryKey
+
+    def __diskPath(self, entryKey: str) -> str:
+        return os.path.join(self._directory, entryKey[:2], entryKey + AnalysisCache.EXTENSION)
+
+    def __loadFromDisk(self, entryKey: str) -> dict:
+        if self._directory is None:
+            return None
+        path = self.__diskPath(entryKey)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            # partially written or unreadable entry, treat as a miss
+            return None
+
+    def __saveToDisk(self, entryKey: str, cfgJson: dict):
+        if self._directory is None:
+            return
+        path = self.__diskPath(entryKey)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmpPath = f'{path}.{os.getpid()}.tmp'
+        with open(tmpPath, 'w') as fp:
+            json.dump(cfgJson, fp)
+        os.replace(tmpPath, path)  # atomic, concurrent writers are safe
+
+    def __remember(self, entryKey: str, value: tuple):
+        self._memory[entryKey] = value
+        self._memory.move_to_end(entryKey)
+        while len(self._memory) > self._capacity:
+            self._memory.popitem(last=False)  # least recently used
+
+    def get(self, contract, loopLimit: int = 2, maximized: bool = False, showOrphanBlocks: bool = False,
+            simplified: bool = False, semantic: bool = False, graph: str = 'cfg', normalized: bool = False,
+            budget: ExplorationBudget = None, workers: int = None) -> tuple:
+        '''
+        return (`Code`, `CFG.toJson` result) of the runtime binary,
+        build the CFG only on a miss
+        - `contract` (`Contract` or `str`): a parsed contract or a binary string
+        - `graph` (`str`): one of `FSG.GRAPHS`
+        - `budget` (`ExplorationBudget`): limits of the exploration on a miss, not part of the key
+        - `workers` (`int`): processes of the exploration on a miss, see `CFG.buildCFG`
+        - other parameters are passed to `CFG.buildCFG` and `CFG.toJson`, and are part of the key
+        '''
+        if not isinstance(contract, Contract):
+            contract = Contract(contract)
+        runtimeBinary = contract.runtimeBinary
+        entryKey = AnalysisCache.__entryKey(AnalysisCache.hashBinary(runtimeBinary), loopLimit, maximized,
+                                            showOrphanBlocks, simplified, semantic, graph, normalized, workers)
+        # memory tier
+        value = self._memory.get(entryKey, None)
+        if value is not None:
+            self._memory.move_to_end(entryKey)
+            self._stats['memoryHits'] += 1
+            return value
+        # disk tier
+        cfgJson = self.__loadFromDisk(entryKey)
+        if cfgJson is not None:
+            self._stats['diskHits'] += 1
+            value = (Disassembler.disassemble(runtimeBinary), cfgJson)
+            self.__remember(entryKey, value)
+            return value
+        # miss
+        self._stats['misses'] += 1
+        code = Disassembler.disassemble(runtimeBinary)
+        cfgJson = AnalysisCache.analyze(code, loopLimit, maximized, showOrphanBlocks, simplified,
+                                        semantic, graph, normalized, budget, workers)
+        value = (code, cfgJson)
+        if budget is None or not budget.isExhausted:
+            self.__remember(entryKey, value)
+            self.__saveToDisk(entryKey, cfgJson)
+        return value
+
+    @staticmethod
+    def analyze(code: Code, loopLimit: int = 2, maximized: bool = False, showOrphanBlocks: bool = False,
+                simplified: bool = False, semantic: bool = False, graph: str = 'cfg', normalized: bool = False,
+                budget: ExplorationBudget = None, workers: int = None) -> dict:
+        fsg = FSG(code)
+        if code.getSize:
+            fsg.buildCFG(loopLimit, maximized, budget, workers)
+        return fsg.getGraph(graph).toJson(showOrphanBlocks, simplified, semantic, normalized)
+
+    def clear(self):
+        '''
+        clear the memory tier, the disk tier is kept
+        '''
+        self._memory.clear()
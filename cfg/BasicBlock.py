@@ -1,4 +1,5 @@
 from cfg.Node import Node
+from cfg.OpcodeNormalizer import OpcodeNormalizer
 from instructions.Instruction import Instruction
 
 
@@ -37,6 +38,15 @@ class BasicBlock(Node):
     def getStackBalance(self) -> int:
         return self._stackBalance
 
+    def getNormalizedOpcodes(self, semantic: bool = False) -> str:
+        '''
+        return the opcode names without offsets and operands, see `OpcodeNormalizer`
+        '''
+        if semantic:
+            return OpcodeNormalizer.normalize('\n'.join(
+                [i.toStringWithSemantic() for i in self._instructions]))
+        return OpcodeNormalizer.fromInstructions(self._instructions)
+
     @property
     def isOrphan(self) -> bool:
         return (not self.hasPredecessors) and (not self.hasSuccessors)
@@ -73,6 +83,20 @@ class BasicBlock(Node):
             return True
         return False
 
+    def copy(self):
+        '''
+        return a block with the same instructions and offsets, without successors and predecessors,
+        the instruction objects are shared
+        '''
+        block = BasicBlock()
+        block._name = self._name
+        block._startOffset = self._startOffset
+        block._endOffset = self._endOffset
+        block._instructions = list(self._instructions)
+        block._size = self._size
+        block._stackBalance = self._stackBalance
+        return block
+
     def instructionsToString(self) -> str:
         # instructions = [str(i) for i in self._instructions]
         instructions = [i.toStringWithArgument() for i in self._instructions]
@@ -113,9 +137,10 @@ class BasicBlock(Node):
             stackBalance += i.getStackBalance
         self._stackBalance = stackBalance
 
-    def toJson(self, simplified: bool = False, semantic: bool = False) -> dict:
+    def toJson(self, simplified: bool = False, semantic: bool = False, normalized: bool = False) -> dict:
         '''
         convert basic block to json according to EtherSolve format
+        - `normalized` (`bool`): add "normalizedOpcodes", the model input text, if `True`
         '''
         result = {}
         result["offset"] = self._startOffset
@@ -130,6 +155,8 @@ class BasicBlock(Node):
         else:
             result["parsedOpcodes"] = '\n'.join(
                 [str(i) for i in self._instructions])
+        if normalized:
+            result["normalizedOpcodes"] = self.getNormalizedOpcodes(semantic)
         return result
 
     def loadFromJson(self, jsonDict: dict):
@@ -0,0 +1,121 @@
+import time
+try:
+    import resource
+except ImportError:  # not Unix
+    resource = None
+
+
+class ExplorationBudget:
+    '''
+    public class
+
+    Limits of one `CFG.buildCFG` run, `None` means unlimited:
+    - `seconds` (`float`): wall-clock deadline, counted from `start`
+    - `maxInstructions` (`int`): executed instructions
+    - `maxStates` (`int`): forked states, i.e. states pushed to the queue
+    - `maxMemory` (`int`): resident memory of the process in bytes,
+    sampled every `checkInterval` instructions
+
+    The budget is consumed by one build, `start` resets it.
+    '''
+    TIME = 'time'
+    INSTRUCTIONS = 'instructions'
+    STATES = 'states'
+    MEMORY = 'memory'
+
+    def __init__(self, seconds: float = None, maxInstructions: int = None, maxStates: int = None,
+                 maxMemory: int = None, checkInterval: int = 4096) -> None:
+        self._seconds = seconds
+        self._maxInstructions = maxInstructions
+        self._maxStates = maxStates
+        self._maxMemory = maxMemory
+        self._checkInterval = checkInterval
+        self.start()
+
+    def start(self):
+        self._startTime = time.perf_counter()
+        self._deadline = None if self._seconds is None else self._startTime + self._seconds
+        self._instructions = 0
+        self._states = 0
+        self._nextMemoryCheck = 0  # sample on the first check
+        self._memory = 0  # last sampled resident memory
+        self._stopReason = None
+
+    @property
+    def isExhausted(self) -> bool:
+        return self._stopReason is not None
+
+    @property
+    def getStopReason(self) -> str:
+        return self._stopReason
+
+    @property
+    def getStats(self) -> dict:
+        return {'complete': self._stopReason is None,
+                'stopReason': self._stopReason,
+                'seconds': time.perf_counter() - self._startTime,
+                'instructions': self._instructions,
+                'states': self._states,
+                'memory': self._memory}
+
+    def remaining(self, parts: int = 1):
+        '''
+        return a started budget of what is left of this one divided by `parts`, with the same deadline,
+        e.g. for each process of a parallel build, see `addStats`
+        '''
+        def left(limit, used):
+            return None if limit is None else max(limit - used, 0) // parts
+        budget = ExplorationBudget(None, left(self._maxInstructions, self._instructions),
+                                   left(self._maxStates, self._states), self._maxMemory, self._checkInterval)
+        budget._deadline = self._deadline
+        return budget
+
+    def addStats(self, stats: dict):
+        '''
+        count the consumption of a budget returned by `remaining`, from its `getStats`
+        '''
+        self._instructions += stats['instructions']
+        self._states += stats['states']
+        self._memory = max(self._memory, stats['memory'])
+        if self._stopReason is None:
+            self._stopReason = stats['stopReason']
+
+    def addInstructions(self, count: int = 1):
+        self._instructions += count
+
+    def addStates(self, count: int = 1):
+        self._states += count
+
+    def check(self) -> bool:
+        '''
+        return `True` while the budget is not exhausted, else record the reason and return `False`
+        '''
+        if self._stopReason is not None:
+            return False
+        if self._maxInstructions is not None and self._instructions >= self._maxInstructions:
+            self._stopReason = ExplorationBudget.INSTRUCTIONS
+        elif self._maxStates is not None and self._states >= self._maxStates:
+            self._stopReason = ExplorationBudget.STATES
+        elif self._deadline is not None and time.perf_counter() >= self._deadline:
+            self._stopReason = ExplorationBudget.TIME
+        elif self._maxMemory is not None and self._instructions >= self._nextMemoryCheck:
+            self._nextMemoryCheck = self._instructions + self._checkInterval
+            self._memory = ExplorationBudget.residentMemory()
+            if self._memory >= self._maxMemory:
+                self._stopReason = ExplorationBudget.MEMORY
+        return self._stopReason is None
+
+    @staticmethod
+    def residentMemory() -> int:
+        '''
+        return the resident memory of the process in bytes, 0 if unknown
+        '''
+        try:
+            with open('/proc/self/statm') as fp:
+                return int(fp.read().split()[1]) * resource.getpagesize()
+        except (OSError, AttributeError, ValueError, IndexError):
+            pass
+        if resource is None:
+            return 0
+        # peak instead of current, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -1,10 +1,15 @@
 from evm.State import State
 from evm.Code import Code
+from evm.ColumnarCode import ColumnarCode
 from cfg.Graph import Graph
 from cfg.Edge import Edge
 from cfg.BasicBlock import BasicBlock
+from cfg.Budget import ExplorationBudget
 from instructions.instructionImplementations import *
+from collections import deque
 import bisect
+import gc
+import time
 
 
 class CFG(Graph):
@@ -12,14 +17,23 @@ class CFG(Graph):
     NODE_DEFAULT_STYLE = {'shape': 'box', 'fontname': 'Courier',
                           'fontsize': '30.0', 'rank': 'same'}
     DOT_EXTENSION = '.dot'
+    ADJACENCY_FORMATS = ('dense', 'coo', 'csr', 'index')
 
     def __init__(self, code: Code = None, name: str = 'cfg', jsonDict: dict = None) -> None:
         super().__init__(name)
         self._filename = name + CFG.DOT_EXTENSION
         self._code = None
         self._nodes = {}
-        self._edges = []
+        self._edges = {}  # {(from name, to name): Edge}, in insertion order
+        self._outEdges = {}  # {from name: {to name: Edge}}
+        self._inEdges = {}  # {to name: {from name: Edge}}
         self._connectedBlocks = set()
+        self._complete = True  # `False` if `buildCFG` stopped on its budget
+        self._buildStats = None
+        self._workerSeconds = None  # CPU seconds of the processes of the last parallel `buildCFG`
+        self._version = 0  # incremented on each change of blocks or edges
+        self._memo = {}  # {key: value derived from the graph at `_memoVersion`}
+        self._memoVersion = 0
         # config
         self._showOrphanBlocks = False
 
@@ -47,10 +61,113 @@ class CFG(Graph):
     def getName(self) -> str:
         return self._name
 
+    @property
+    def getVersion(self) -> int:
+        '''
+        return a counter changed by every change of blocks or edges made through the graph methods
+        '''
+        return self._version
+
+    def _changed(self):
+        self._version += 1
+
+    def _memoize(self, key, function):
+        '''
+        return `function()`, cached under `key` until the graph changes
+        '''
+        if self._memoVersion != self.getVersion:
+            self._memo = {}
+            self._memoVersion = self.getVersion
+        if key not in self._memo:
+            self._memo[key] = function()
+        return self._memo[key]
+
+    def setNodes(self, nodes: dict):
+        self._nodes = nodes
+        self._changed()
+
+    @property
+    def getEdges(self) -> list:
+        return list(self._edges.values())
+
+    def setEdges(self, edges: list):
+        '''
+        replace the edges and rebuild the index, the first edge of a (from, to) pair is kept
+        '''
+        self._edges = {}
+        self._outEdges = {}
+        self._inEdges = {}
+        for edge in edges:
+            self.__indexEdge(edge)
+        self._changed()
+
+    def reindexEdges(self):
+        '''
+        rebuild the edge index after blocks are renamed, the order of edges is kept
+        '''
+        self.setEdges(self.getEdges)
+
+    def getEdge(self, fromName: int, toName: int) -> Edge:
+        return self._edges.get((fromName, toName), None)
+
+    def getOutEdges(self, name: int) -> list:
+        return list(self._outEdges.get(name, {}).values())
+
+    def getInEdges(self, name: int) -> list:
+        return list(self._inEdges.get(name, {}).values())
+
+    def __indexEdge(self, edge: Edge) -> bool:
+        key = edge.getKey
+        if key in self._edges:
+            return False
+        self._edges[key] = edge
+        self._outEdges.setdefault(key[0], {})[key[1]] = edge
+        self._inEdges.setdefault(key[1], {})[key[0]] = edge
+        self._changed()
+        return True
+
+    def __unindexEdge(self, edge: Edge) -> bool:
+        fromName, toName = key = edge.getKey
+        if self._edges.pop(key, None) is None:
+            return False
+        outEdges = self._outEdges[fromName]
+        del outEdges[toName]
+        if not outEdges:
+            del self._outEdges[fromName]
+        inEdges = self._inEdges[toName]
+        del inEdges[fromName]
+        if not inEdges:
+            del self._inEdges[toName]
+        self._changed()
+        return True
+
+    @property
+    def isComplete(self) -> bool:
+        return self._complete
+
+    @property
+    def getBuildStats(self) -> dict:
+        '''
+        return the statistics of the last `buildCFG` run with a budget, `None` without a budget
+        '''
+        return self._buildStats
+
     def setCode(self, code: Code):
         self._code = code
+        self._changed()
+
+    def setBlockInstructions(self, block: BasicBlock, instructions: list):
+        '''
+        replace the instructions of `block`, use it instead of `BasicBlock.setInstructions`
+        once the graph is built, so the offset index is rebuilt
+        '''
+        block.setInstructions(instructions)
+        self._changed()
 
     def __initBasicBlocks(self):
+        if isinstance(self._code, ColumnarCode):
+            self.__initBasicBlocksFromColumns()
+            return
         result = {}
         curr = BasicBlock()
         for offset, instruction in self._code:
@@ -65,13 +182,25 @@ class CFG(Graph):
             result[curr.getName] = curr  # archive block
         self._nodes = result
 
+    def __initBasicBlocksFromColumns(self):
+        '''
+        split blocks on the opcode column, then create the instructions of each block
+        '''
+        result = {}
+        for start, end in self._code.getBlockRanges():
+            block = BasicBlock()
+            block.setInstructions(self._code.getRows(start, end))
+            block.resetMeta()
+            block.resetStackBalance()
+            result[block.getName] = block
+        self._nodes = result
+
     def _addEdge(self, from_: BasicBlock, to: BasicBlock, type_, weight: int = 0) -> bool:
         if from_ is None or to is None:
             return False
-        edge = Edge(from_, to, type_, weight)
-        if edge in self._edges:
+        if (from_.getName, to.getName) in self._edges:
             return False
-        self._edges.append(edge)
+        self.__indexEdge(Edge(from_, to, type_, weight))
         from_.addSuccessor(to)
         to.addPredecessor(from_)
         self._connectedBlocks.add(from_.getName)
@@ -81,65 +210,235 @@ class CFG(Graph):
     def getBlockByName(self, name: int) -> BasicBlock:
         return self._nodes.get(name, None)
 
-    def buildCFG(self, loopLimit: int = 2, maximized: bool = False):
+    def buildCFG(self, loopLimit: int = 2, maximized: bool = False, budget: ExplorationBudget = None,
+                 workers: int = None):
         '''
         build CFG by BFS
         - `loopLimit` (`int`): the limitation of visit count of each block, to avoid the infinite loop when there are circles in graph
         - `maximized` (`bool`): if `True`, try to traverse the circles at max times until no edge is added after `loopLimit` times
+        - `budget` (`ExplorationBudget`): if given, stop early when it is exhausted,
+        the CFG is then partial, see `isComplete` and `getBuildStats`
+        - `workers` (`int`): if given, explore the functions behind the dispatcher separately
+        on `workers` processes, see `__buildParallel`
+
+        states are deduplicated by `State.getFingerprint`, i.e. the pc and the resolved stack values
+        '''
+        if budget is not None:
+            budget.start()
+        self._workerSeconds = None
+        if workers is None:
+            self._explore(deque([State(self._code)]), loopLimit, maximized, budget)  # avoid recursion
+        else:
+            self.__buildParallel(loopLimit, maximized, budget, workers)
+        if budget is not None:
+            self._complete = not budget.isExhausted
+            self._buildStats = budget.getStats
+
+    def _explore(self, stateQueue: deque, loopLimit: int, maximized: bool, budget: ExplorationBudget = None,
+                 onSelectorBranch=None, executed: dict = None):
+        '''
+        BFS from the states of `stateQueue`, see `buildCFG`
+        - `onSelectorBranch` (`function`): if given, called with the state of each taken selector branch,
+        see `_isSelectorBranch`, instead of exploring it
+        - `executed` (`dict`): if given, updated to {block name: number of instructions executed from its start}
         '''
-        stateQueue = [State(self._code)]  # avoid recursion
         blockVisitCnt = {_: 0 for _ in self._nodes.keys()}  # avoid loop
-        visitedStates = []  # avoid loop
+        visitedStates = set()  # fingerprints of visited states, avoid loop
         while len(stateQueue):
+            if budget is not None and not budget.check():
+                break
             # the while loop executes instructions in one block
-            state = stateQueue.pop(0)
+            state = stateQueue.popleft()
             currOffset = state.pc
-            if blockVisitCnt[currOffset] > loopLimit or state in visitedStates:
+            if currOffset not in blockVisitCnt:
+                # no block starts here, e.g. empty code
+                continue
+            fingerprint = state.getFingerprint
+            if blockVisitCnt[currOffset] > loopLimit or fingerprint in visitedStates:
                 continue
-            visitedStates.append(state.copy())
+            visitedStates.add(fingerprint)
             blockVisitCnt[currOffset] += 1
-            currBlock = self.getBlockByName(currOffset)
+            queued = len(stateQueue)
+            edges, successors, selectorBranch, count = self._executeBlock(state, self.getBlockByName(currOffset))
             addedEdge = False
-            i = state.getNext()
-            while i is not None:
-                if isinstance(i, JumpDestInstruction) and i.getOffset != currBlock.getStartOffset:
-                    # have normal ins before JUMPDEST
-                    stateQueue.append(state.copy())  # push state
-                    toBlock = self.getBlockByName(i.getOffset)
-                    addedEdge = self._addEdge(currBlock, toBlock,
-                                              Edge.NORMAL, state.stack.getLength)  # add edge
-                    break  # break before execution
-                i.execute(state)  # execute instruction to solve jump target
-                if isinstance(i, HaltInstruction) or isinstance(i, JumpInstruction):  # halt
-                    if isinstance(i, JumpInstruction):
-                        # false branch
-                        if isinstance(i, JUMPI):
-                            falseBranchOffset = i.getNextOffset()
-                            toFalseBlock = self.getBlockByName(
-                                falseBranchOffset)
-                            addedEdge = self._addEdge(currBlock, toFalseBlock,
-                                                      Edge.FALSE, state.stack.getLength)  # add edge
-                            state.pc = falseBranchOffset
-                            stateQueue.append(state.copy())  # False branch
-                        # true branch or jump destination
-                        jumpTargetOffset = i.getDestination
-                        if jumpTargetOffset is None:
-                            # unsolved jump destination
-                            break
-                        edgeType = Edge.TRUE if isinstance(
-                            i, JUMPI) else Edge.JUMP
-                        toTrueBlock = self.getBlockByName(jumpTargetOffset)
-                        addedEdge = self._addEdge(currBlock, toTrueBlock,
-                                                  edgeType, state.stack.getLength)  # add edge
-                        state.pc = jumpTargetOffset
-                        stateQueue.append(state.copy())
-                    break  # break after execution
-                i = state.getNext()
+            for from_, to, type_, weight in edges:
+                addedEdge = self._addEdge(from_, to, type_, weight)  # add edge
+            if onSelectorBranch is None:
+                selectorBranch = None
+            stateQueue.extend(successor for index, successor in enumerate(successors) if index != selectorBranch)
+            if selectorBranch is not None:
+                onSelectorBranch(successors[selectorBranch])  # explored by a separate task
+            if executed is not None and count > executed.get(currOffset, 0):
+                executed[currOffset] = count
+            if budget is not None:
+                budget.addInstructions(count)
+                budget.addStates(len(stateQueue) - queued)
             if maximized and addedEdge:
                 # in maximized mode, clear count if new edges are added
                 blockVisitCnt = {
                     _: 0 for _ in self._nodes.keys()}
 
+    def _executeBlock(self, state: State, currBlock: BasicBlock) -> tuple:
+        '''
+        execute the instructions of `currBlock` from `state` up to a jump, a halt or the next block,
+        return (edges to add in order as (from, to, type, weight), successor states,
+        index of the taken selector branch in the successors or `None`, executed instructions)
+        '''
+        edges = []
+        successors = []
+        selectorBranch = None
+        executed = 0
+        i = state.getNext()
+        while i is not None:
+            if isinstance(i, JumpDestInstruction) and i.getOffset != currBlock.getStartOffset:
+                # have normal ins before JUMPDEST
+                successors.append(state.copy())  # push state
+                toBlock = self.getBlockByName(i.getOffset)
+                edges.append((currBlock, toBlock, Edge.NORMAL, state.stack.getLength))
+                break  # break before execution
+            i.execute(state)  # execute instruction to solve jump target
+            executed += 1
+            if isinstance(i, HaltInstruction) or isinstance(i, JumpInstruction):  # halt
+                if isinstance(i, JumpInstruction):
+                    # false branch
+                    if isinstance(i, JUMPI):
+                        falseBranchOffset = i.getNextOffset()
+                        toFalseBlock = self.getBlockByName(
+                            falseBranchOffset)
+                        edges.append((currBlock, toFalseBlock, Edge.FALSE, state.stack.getLength))
+                        state.pc = falseBranchOffset
+                        successors.append(state.copy())  # False branch
+                    # true branch or jump destination
+                    jumpTargetOffset = i.getDestination
+                    if jumpTargetOffset is None:
+                        # unsolved jump destination
+                        break
+                    edgeType = Edge.TRUE if isinstance(
+                        i, JUMPI) else Edge.JUMP
+                    toTrueBlock = self.getBlockByName(jumpTargetOffset)
+                    edges.append((currBlock, toTrueBlock, edgeType, state.stack.getLength))
+                    state.pc = jumpTargetOffset
+                    if CFG._isSelectorBranch(i):
+                        selectorBranch = len(successors)
+                    successors.append(state.copy())
+                break  # break after execution
+            i = state.getNext()
+        return edges, successors, selectorBranch, executed
+
+    @staticmethod
+    def _isSelectorBranch(instruction) -> bool:
+        '''
+        `True` if `instruction` is the JUMPI of a function dispatcher, its condition an EQ with a PUSH4 argument,
+        must be called right after its execution
+        '''
+        if not isinstance(instruction, JUMPI) or len(instruction.getArguments) < 2:
+            return False
+        condition = instruction.getArguments[1]
+        if not isinstance(condition, EQ):
+            return False
+        return any(isinstance(argument, PUSH) and argument.getName == 'PUSH4'
+                   for argument in condition.getArguments)
+
+    def __buildParallel(self, loopLimit: int, maximized: bool, budget: ExplorationBudget, workers: int):
+        '''
+        explore from the entry without the selector branches, then the branches on `workers` processes
+        forked from the graph of the dispatcher, each process explores its share of the branches in one BFS,
+        their edges and instruction annotations are merged into this graph in the order of the processes
+
+        Each process has its own visit counts and visited states, so the blocks shared by functions
+        can be visited up to `loopLimit` times per process: the edges are a superset of the single BFS,
+        and an instruction executed by several processes keeps the annotation of the last one.
+        The rest of a budget after the dispatcher is split among the processes, see `ExplorationBudget.remaining`.
+        Without `fork`, or with one worker, the branches are explored in this process,
+        as are the branches of a process that fails.
+        '''
+        import multiprocessing
+        seeds = {}
+        self._explore(deque([State(self._code)]), loopLimit, maximized, budget,
+                      lambda state: seeds.setdefault(state.getFingerprint, state))
+        seeds = list(seeds.values())
+        if workers <= 1 or len(seeds) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            self._explore(deque(seeds), loopLimit, maximized, budget)
+            return
+        workers = min(workers, len(seeds))
+        context = multiprocessing.get_context('fork')
+        processes = []
+        failed = []
+        self._workerSeconds = []
+        gc.freeze()  # the collections of the processes do not scan, nor copy, the objects of this one
+        try:
+            for k in range(workers):
+                # forked from the graph of the dispatcher, the arguments are not pickled
+                group = seeds[k::workers]  # balanced
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=self._exploreSeeds, daemon=True, args=(
+                    group, loopLimit, maximized, None if budget is None else budget.remaining(workers), sender))
+                process.start()
+                sender.close()
+                processes.append((process, receiver, group))
+            collecting = gc.isenabled()
+            gc.disable()  # the results are many small objects, each collection would scan the whole graph
+            try:
+                for process, receiver, group in processes:
+                    try:
+                        result = receiver.recv()
+                    except EOFError:
+                        failed += group  # the process failed
+                    else:
+                        self.__mergeExploration(result, budget)  # while the next processes run
+                    receiver.close()
+                    process.join()
+            finally:
+                if collecting:
+                    gc.enable()
+        finally:
+            gc.unfreeze()
+        if failed:
+            self._explore(deque(failed), loopLimit, maximized, budget)
+
+    def __mergeExploration(self, result: tuple, budget: ExplorationBudget):
+        '''
+        add the edges and set the instruction annotations of an `_exploreSeeds` result
+        '''
+        edges, annotations, stats, seconds = result
+        for fromName, toName, type_, weight in edges:
+            self._addEdge(self.getBlockByName(fromName), self.getBlockByName(toName), type_, weight)
+        for (_, offset), annotation in annotations.items():
+            self._code.get(offset).setAnnotation(annotation, self._code)
+        if budget is not None:
+            budget.addStats(stats)
+        self._workerSeconds.append(seconds)
+
+    def _exploreSeeds(self, states: list, loopLimit: int, maximized: bool, budget: ExplorationBudget = None,
+                      connection=None) -> tuple:
+        '''
+        explore from the states in one BFS on this graph, return (new edges as (from, to, type, weight),
+        {(block name, offset): `Instruction.getAnnotation`} of the executed instructions,
+        budget statistics or `None`, CPU seconds)
+        - `connection` (`Connection`): if given, the result is sent to it instead, in a process of `__buildParallel`
+        '''
+        start = time.process_time()
+        edgeCount = len(self._edges)
+        executed = {}
+        self._explore(deque(states), loopLimit, maximized, budget, executed=executed)
+        edges = [(e.getFrom.getName, e.getTo.getName, e.getType, e.getWeight)
+                 for e in list(self._edges.values())[edgeCount:]]
+        annotations = {(name, i.getOffset): i.getAnnotation()
+                       for name, count in executed.items()
+                       for i in self.getBlockByName(name).getInstructions[:count]}
+        result = (edges, annotations, None if budget is None else budget.getStats, time.process_time() - start)
+        if connection is None:
+            return result
+        connection.send(result)
+        connection.close()
+
+    @property
+    def getWorkerSeconds(self) -> list:
+        '''
+        return the CPU seconds of each process of the last `buildCFG` with workers, `None` if there was none
+        '''
+        return self._workerSeconds
+
     def getOrphanBlocks(self) -> list:
         result = []
         for block in self._nodes.values():
@@ -155,28 +454,117 @@ class CFG(Graph):
                     result.append(i)
         return result
 
-    def getAdjacencyMatrix(self):
+    def getNodeIndex(self) -> dict:
+        '''
+        return {block name: row in the adjacency matrix}, blocks sorted by offset,
+        cached until the graph changes
+        '''
+        return self._memoize('nodeIndex', lambda: {name: i for i, name in enumerate(sorted(self._nodes))})
+
+    def getAdjacencyMatrix(self, format: str = 'dense', dtype=None):
+        '''
+        return the weighted adjacency matrix with ones on the diagonal, rows as in `getNodeIndex`
+        - `format` (`str`): one of `ADJACENCY_FORMATS`
+            - 'dense': `np.ndarray`, a new array on each call, built from the cached index
+            - 'coo', 'csr': `scipy.sparse` matrix
+            - 'index': (rows, columns, values) arrays of the entries sorted by row and column, no scipy needed,
+            cached until the graph changes and read-only
+        - `dtype`: type of the values, `float64` if `None`
+        '''
+        import numpy as np
+        if format not in CFG.ADJACENCY_FORMATS:
+            raise ValueError(f'unknown adjacency matrix format: {format}')
+        dtype = np.dtype(np.float64 if dtype is None else dtype)
+        if format == 'dense':
+            return self.__buildAdjacencyMatrix(dtype)
+        rows, columns, values = self._memoize(('adjacencyIndex', dtype.str),
+                                              lambda: self.__buildAdjacencyIndex(dtype))
+        if format == 'index':
+            return rows, columns, values
+        from scipy.sparse import coo_matrix
+        size = len(self._nodes)
+        matrix = coo_matrix((values, (rows, columns)), shape=(size, size), copy=True)
+        return matrix.tocsr() if format == 'csr' else matrix
+
+    def __buildAdjacencyIndex(self, dtype) -> tuple:
+        import numpy as np
+        nodeIndex = self.getNodeIndex()
+        selfLoops = {edge.getFrom.getName for edge in self._edges.values() if edge.getFrom is edge.getTo}
+        diagonal = [i for name, i in nodeIndex.items() if name not in selfLoops]
+        edges = [(nodeIndex[edge.getFrom.getName], nodeIndex[edge.getTo.getName], edge.getWeight)
+                 for edge in self._edges.values()]
+        edgeArray = np.array(edges, dtype=np.int64).reshape(-1, 3)
+        rows = np.concatenate([np.array(diagonal, dtype=np.int32), edgeArray[:, 0].astype(np.int32)])
+        columns = np.concatenate([np.array(diagonal, dtype=np.int32), edgeArray[:, 1].astype(np.int32)])
+        values = np.concatenate([np.ones(len(diagonal), dtype=dtype), edgeArray[:, 2].astype(dtype)])
+        order = np.lexsort((columns, rows))
+        result = (rows[order], columns[order], values[order])
+        for array in result:
+            array.flags.writeable = False
+        return result
+
+    def __buildAdjacencyMatrix(self, dtype):
         import numpy as np
-        nodeToIndex = {n[1]: i for i, n in enumerate(
-            sorted(self._nodes.items()))}
-        matrix = np.eye(len(self._nodes))
-        for edge in self._edges:
-            matrix[nodeToIndex[edge.getFrom],
-                   nodeToIndex[edge.getTo]] = edge.getWeight
+        rows, columns, values = self.getAdjacencyMatrix('index', dtype)
+        matrix = np.zeros((len(self._nodes), len(self._nodes)), dtype=dtype)
+        matrix[rows, columns] = values
         return matrix
 
     def findInstrcutionPositionByOffset(self, offset: int) -> tuple:
-        if offset < 0:
+        '''
+        return (block name, index in the block) of the instruction at `offset`, `None` if there is none
+        '''
+        names, _, pointers, keys = self.__getOffsetIndex()
+        nodeNameindex = bisect.bisect_right(names, offset) - 1
+        if offset < 0 or offset >= 1 << 32 or nodeNameindex < 0:
             return None
-        nodeNames = list(self._nodes.keys())
-        nodeNameindex = bisect.bisect_right(nodeNames, offset) - 1
-        nodeName = nodeNames[nodeNameindex]
-        node = self.getBlockByName(nodeName)
-        offsets = [i.getOffset for i in node.getInstructions]
-        index = bisect.bisect_left(offsets, offset)
-        if index == len(offsets) or offsets[index] != offset:
+        key = (nodeNameindex << 32) | offset
+        start, end = int(pointers[nodeNameindex]), int(pointers[nodeNameindex + 1])
+        index = start + int(keys[start:end].searchsorted(key))
+        if index == end or keys[index] != key:
             return None
-        return (nodeName, index)
+        return (names[nodeNameindex], index - start)
+
+    def findInstructionPositionsByOffsets(self, offsets) -> tuple:
+        '''
+        `findInstrcutionPositionByOffset` for many offsets at once,
+        return (block names, indices in the blocks) as `int64` arrays, both -1 where there is no instruction
+        - `offsets` (`array-like`): the offsets to look up, e.g. the program counters of a trace
+        '''
+        import numpy as np
+        names, starts, pointers, keys = self.__getOffsetIndex()
+        offsets = np.asarray(offsets, dtype=np.int64).ravel()
+        blocks = np.searchsorted(starts, offsets, side='right') - 1
+        found = (blocks >= 0) & (offsets >= 0) & (offsets < 1 << 32)
+        blocks[~found] = 0
+        queries = (blocks << 32) | (offsets & 0xffffffff)
+        positions = np.searchsorted(keys, queries)
+        found &= positions < len(keys)
+        found[found] = keys[positions[found]] == queries[found]
+        resultNames = np.full(len(offsets), -1, dtype=np.int64)
+        resultIndices = np.full(len(offsets), -1, dtype=np.int64)
+        resultNames[found] = starts[blocks[found]]
+        resultIndices[found] = positions[found] - pointers[blocks[found]]
+        return resultNames, resultIndices
+
+    def __getOffsetIndex(self) -> tuple:
+        '''
+        return (sorted block names, the names as `int64`, `int64[N+1]` pointers, `int64` keys),
+        the instruction `j` of the `i`-th block has the key `keys[pointers[i] + j]` = (`i` << 32) | its offset,
+        so the keys are sorted, cached until the graph changes
+        '''
+        return self._memoize('offsetIndex', self.__buildOffsetIndex)
+
+    def __buildOffsetIndex(self) -> tuple:
+        import numpy as np
+        names = sorted(self._nodes)
+        counts = [len(self._nodes[name]) for name in names]
+        pointers = np.zeros(len(names) + 1, dtype=np.int64)
+        pointers[1:] = np.cumsum(counts)
+        offsets = np.fromiter((i.getOffset for name in names for i in self._nodes[name].getInstructions),
+                              dtype=np.int64, count=pointers[-1])
+        keys = (np.repeat(np.arange(len(names), dtype=np.int64), counts) << 32) | offsets
+        return names, np.array(names, dtype=np.int64), pointers, keys
 
     def render(self, showOrphanBlocks: bool = False):
         from graphviz import Digraph
@@ -188,7 +576,7 @@ class CFG(Graph):
             for node in self._nodes.values():
                 if not node.isOrphan:
                     self._renderNode(c, node)
-            for edge in self._edges:
+            for edge in self._edges.values():
                 self._renderEdge(c, edge)
         if showOrphanBlocks:
             with g.subgraph(name='OrphanBlocks') as o:
@@ -217,7 +605,7 @@ class CFG(Graph):
             print(f"{v}: \n{v.instructionsToString()}")
 
     def printEdges(self):
-        for edge in self._edges:
+        for edge in self._edges.values():
             print(edge)
 
     def toBinaryString(self) -> str:
@@ -226,12 +614,13 @@ class CFG(Graph):
     def getOpcodeSequence(self, includeOperand: bool = False) -> list:
         return self._code.getOpcodeSequence(includeOperand)
 
-    def toJson(self, showOrphanBlocks: bool = False, simplified: bool = False, semantic: bool = False) -> dict:
+    def toJson(self, showOrphanBlocks: bool = False, simplified: bool = False, semantic: bool = False, normalized: bool = False) -> dict:
         '''
         convert cfg to json according to EtherSolve format
         - `showOrphanBlocks` (`bool`): include the orphan nodes if `True`
         - `simplified` (`bool`): exclude the raw bytecode attributes if `True`
         - `semantic` (`bool`): use semantic annotation for instructions if `True`
+        - `normalized` (`bool`): add the normalized opcodes to the nodes if `True`, see `OpcodeNormalizer`
         '''
         result = {}
         if not simplified:
@@ -241,44 +630,71 @@ class CFG(Graph):
         nodes = []
         for k, v in sorted(self._nodes.items()):
             if not v.isOrphan or showOrphanBlocks:
-                nodes.append(v.toJson(simplified, semantic))
+                nodes.append(v.toJson(simplified, semantic, normalized))
         result["nodes"] = nodes
         # add edges
         edges = []
-        for edge in self._edges:
+        for edge in self._edges.values():
             edges.append(edge.toJson())
         result["edges"] = edges
 
         return result
 
+    def toArrays(self, showOrphanBlocks: bool = False) -> dict:
+        '''
+        export the graph as compact arrays, without json and networkx
+        - `nodeOffsets` (`int32[N]`): start offsets of the nodes, sorted, the node ids in the model
+        - `edgeFrom`, `edgeTo` (`int32[E]`): edges as indices into `nodeOffsets`
+        - `edgeWeight` (`float32[E]`): edge weights
+        - `tokens` (`uint8[T]`): opcodes of all nodes, concatenated
+        - `tokenOffsets` (`int32[N+1]`): opcodes of node `i` are `tokens[tokenOffsets[i]:tokenOffsets[i+1]]`
+
+        same nodes and edges as `toJson`, in the same order
+        '''
+        import numpy as np
+        nodes = [v for _, v in sorted(self._nodes.items())
+                 if not v.isOrphan or showOrphanBlocks]
+        nodeToIndex = {node.getName: i for i, node in enumerate(nodes)}
+        tokenOffsets = np.zeros(len(nodes) + 1, dtype=np.int32)
+        tokenOffsets[1:] = np.cumsum([len(node) for node in nodes])
+        tokens = np.fromiter((i.getOpcode for node in nodes for i in node.getInstructions),
+                             dtype=np.uint8, count=tokenOffsets[-1])
+        edges = [(nodeToIndex[edge.getFrom.getName], nodeToIndex[edge.getTo.getName], edge.getWeight)
+                 for edge in self._edges.values()]
+        edgeArray = np.array(edges, dtype=np.int64).reshape(-1, 3)
+        return {'nodeOffsets': np.array([node.getStartOffset for node in nodes], dtype=np.int32),
+                'edgeFrom': edgeArray[:, 0].astype(np.int32),
+                'edgeTo': edgeArray[:, 1].astype(np.int32),
+                'edgeWeight': edgeArray[:, 2].astype(np.float32),
+                'tokens': tokens,
+                'tokenOffsets': tokenOffsets}
+
     def copy(self):
-        # init new CFG, create new blocks
-        newCFG = CFG(code=self.getCode, name=self.getName)
+        '''
+        return a structural clone, new blocks and edges sharing the instruction objects,
+        the code is not split into blocks again
+        '''
+        newCFG = CFG(name=self.getName)
+        newCFG._code = self._code
         newCFG._showOrphanBlocks = self._showOrphanBlocks
+        newCFG._nodes = {name: block.copy() for name, block in self._nodes.items()}
         # reconnect new blocks via existing edges
-        for edge in self.getEdges:
-            fromName = edge.getFrom.getName
-            toName = edge.getTo.getName
-            from_ = newCFG.getBlockByName(fromName)
-            to = newCFG.getBlockByName(toName)
+        for edge in self._edges.values():
+            from_ = newCFG.getBlockByName(edge.getFrom.getName)
+            to = newCFG.getBlockByName(edge.getTo.getName)
             newCFG._addEdge(from_, to, type_=edge.getType,
                             weight=edge.getWeight)
         return newCFG
 
     def _removeBlock(self, block: BasicBlock):
         # classify edges
-        inEdges = {}
-        outEdges = {}
-        removeEdges = []
-        for edge in self.getEdges:
-            if edge.getFrom is block or edge.getTo is block:
-                removeEdges.append(edge)
-            if edge.getFrom is block and edge.getTo is block:  # self-loop edge
-                continue
-            elif edge.getFrom is block:  # out edge
-                outEdges[edge.getTo] = edge
-            elif edge.getTo is block:  # in edge
-                inEdges[edge.getFrom] = edge
+        name = block.getName
+        outEdges = {edge.getTo: edge for edge in self.getOutEdges(name)}
+        inEdges = {edge.getFrom: edge for edge in self.getInEdges(name)}
+        removeEdges = list(outEdges.values()) + \
+            [edge for edge in inEdges.values() if edge.getFrom is not block]
+        outEdges.pop(block, None)  # self-loop edge
+        inEdges.pop(block, None)
         # reconnect predecessors and successors
         # fully connect edges
         for p in block.getPredecessors:
@@ -298,12 +714,10 @@ class CFG(Graph):
             self._removeEdge(e)
         # remove block
         self.getNodes.pop(block.getName, None)
+        self._changed()
 
     def _removeEdge(self, edge: Edge):
-        try:
-            self.getEdges.remove(edge)
-        except:
-            pass
+        self.__unindexEdge(edge)
         from_ = edge.getFrom
         to = edge.getTo
         fromSuccessors = from_.getSuccessors
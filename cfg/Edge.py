@@ -27,6 +27,13 @@ class Edge:
     def getWeight(self) -> int:
         return self._weight
 
+    @property
+    def getKey(self) -> tuple:
+        '''
+        return (from name, to name), the key of the edge in a `CFG`, equal edges have equal keys
+        '''
+        return (self._from.getName, self._to.getName)
+
     def __str__(self) -> str:
         return f"[{self._from}] -{self._weight}-> [{self._to}] ({self._type})"
 
@@ -2,6 +2,7 @@ from cfg.CFG import CFG, BasicBlock, Edge
 from evm.Code import Code
 from instructions.instructionImplementations import *
 from copy import deepcopy
+import heapq
 
 
 class FSG(CFG):
@@ -23,6 +24,7 @@ class FSG(CFG):
             ORIGIN,
             CallInstruction
             )
+    GRAPHS = ('cfg', 'api', 'combined')
 
     def __init__(self, code: Code = None, name: str = 'fsg', cfg: CFG = None) -> None:
         if cfg is None:
@@ -33,51 +35,157 @@ class FSG(CFG):
             self._code = cfg._code
             self._nodes = cfg._nodes
             self._edges = cfg._edges
+            self._outEdges = cfg._outEdges
+            self._inEdges = cfg._inEdges
             self._connectedBlocks = cfg._connectedBlocks
             self._showOrphanBlocks = cfg._showOrphanBlocks
+            self._complete = cfg._complete
+            self._buildStats = cfg._buildStats
+            self._version = 0
+            self._memo = {}
+            self._memoVersion = cfg.getVersion
+        self._source = cfg  # blocks and edges are shared with `cfg`, changes of either are changes of both
         self.APIsubgraph = None
         self.combinedCFG = None
+        self._APIsubgraphVersion = None  # version of this graph when `APIsubgraph` was generated
+        self._combinedFrom = None  # `APIsubgraph` combined into `combinedCFG`
+
+    @property
+    def getVersion(self) -> int:
+        if self._source is None:
+            return self._version
+        return self._version + self._source.getVersion
+
+    def _changed(self):
+        super()._changed()
+        if self._source is not None:
+            # the blocks and edges of `_source` changed as well
+            self._source._changed()
 
     def getAPIsubgraph(self) -> CFG:
+        '''
+        return the API sub-graph, generated again if this graph changed since the last one
+        '''
+        if self.APIsubgraph is None or self._APIsubgraphVersion != self.getVersion:
+            self.generateAPIsubgraph()
         return self.APIsubgraph
 
     def getCombinedCFG(self) -> CFG:
+        '''
+        return the combined graph, combined again if the API sub-graph changed since the last one
+        '''
+        APIsubgraph = self.getAPIsubgraph()
+        if self.combinedCFG is None or self._combinedFrom is not APIsubgraph:
+            self.combine()
         return self.combinedCFG
 
-    def generateAPIsubgraph(self, shiftOffset: bool = True) -> CFG:
+    def getGraph(self, graph: str = 'combined') -> CFG:
+        '''
+        return this graph, the API sub-graph or the combined graph
+        - `graph` (`str`): one of `GRAPHS`
+        '''
+        if graph == 'api':
+            return self.getAPIsubgraph()
+        if graph == 'combined':
+            return self.getCombinedCFG()
+        return self
+
+    def generateAPIsubgraph(self, shiftOffset: bool = True, contraction: bool = True) -> CFG:
         '''
         create an API sub-graph containing only the API instructions
         - `shiftOffset` (`bool`): if `True`, change all offset of blocks
         to offset + code size, to avoid same offset with original graph
+        - `contraction` (`bool`): if `True`, remove the empty blocks at once with `_contract`,
+        otherwise one by one with `_removeBlock`, same edges and weights
         '''
+        version = self.getVersion
         newCFG = self.copy()
         for block in list(newCFG.getNodes.values()):
             newInstructions = []
             for i in block.getInstructions:
                 if isinstance(i, FSG.APIS):
                     newInstructions.append(i)
-            block.setInstructions(newInstructions)
-            if len(newInstructions) == 0:
+            newCFG.setBlockInstructions(block, newInstructions)
+            if len(newInstructions) == 0 and not contraction:
                 # remove empty block from graph
                 newCFG._removeBlock(block)
+        if contraction:
+            FSG._contract(newCFG)
         if shiftOffset:
             blocks = newCFG.getNodes
             for key in list(blocks.keys()):
                 block = blocks.pop(key)
                 block.setStartOffset(block.getStartOffset+self.getCode.getSize)
                 blocks[block.getStartOffset] = block
+            newCFG.reindexEdges()
         self.APIsubgraph = newCFG
+        self._APIsubgraphVersion = version
         return newCFG
 
+    @staticmethod
+    def _contract(cfg: CFG):
+        '''
+        remove the empty blocks of `cfg`, connect each remaining block to the remaining blocks
+        it reaches through empty blocks with a `COMBINE` edge, weighted by the sum along the path
+
+        `_removeBlock` in offset order keeps the first path found, that is the path with the
+        smallest decreasing sequence of the largest empty offsets after each position (suffix maxima).
+        One search per remaining block pops paths in this order, instead of connecting
+        predecessors and successors at each removal.
+
+        The edges are in the order of `_removeBlock`: the edges between remaining blocks first,
+        then the `COMBINE` edges by the removal that adds them, the largest empty offset of their path.
+        The edges added by one removal are sorted by offsets, `_removeBlock` adds them in the order
+        of the predecessor and successor sets, which changes from run to run.
+        '''
+        blocks = cfg.getNodes
+        kept = {name for name, block in blocks.items() if len(block)}
+        edges = [edge for edge in cfg.getEdges
+                 if edge.getFrom.getName in kept and edge.getTo.getName in kept]
+        combined = []  # (removal, from, to, edge)
+        for name in blocks:
+            if name not in kept:
+                continue
+            source = blocks[name]
+            heap = [((), edge.getTo.getName, edge.getWeight) for edge in cfg.getOutEdges(name)]
+            heapq.heapify(heap)
+            visited = set()
+            while heap:
+                suffixMaxima, current, weight = heapq.heappop(heap)
+                if current in visited:
+                    continue
+                visited.add(current)
+                if current in kept:
+                    if cfg.getEdge(name, current) is None:
+                        combined.append((suffixMaxima[0], name, current,
+                                         Edge(source, blocks[current], Edge.COMBINE, weight)))
+                    continue
+                suffixMaxima = tuple(m for m in suffixMaxima if m > current) + (current,)
+                for edge in cfg.getOutEdges(current):
+                    to = edge.getTo.getName
+                    if to not in visited:
+                        heapq.heappush(heap, (suffixMaxima, to, weight + edge.getWeight))
+        combined.sort(key=lambda item: item[:3])
+        edges += [edge for _, _, _, edge in combined]
+        for name in list(blocks.keys()):
+            if name in kept:
+                blocks[name].setSuccessors(set())
+                blocks[name].setPredecessors(set())
+            else:
+                blocks.pop(name)
+        for edge in edges:
+            edge.getFrom.addSuccessor(edge.getTo)
+            edge.getTo.addPredecessor(edge.getFrom)
+        cfg.setEdges(edges)
+
     def combine(self):
         '''
         combine the original and API graphs
         '''
-        APIsubgraph = self.APIsubgraph
-        if APIsubgraph is None:
-            return
+        APIsubgraph = self.getAPIsubgraph()
         newCFG = self.copy()
         newCFG.getNodes.update(APIsubgraph.getNodes)
         newCFG.setEdges(newCFG.getEdges + APIsubgraph.getEdges)
         self.combinedCFG = newCFG
+        self._combinedFrom = APIsubgraph
         return newCFG
@@ -0,0 +1,43 @@
+import re
+
+
+class OpcodeNormalizer:
+    '''
+    public static class
+
+    Normalized opcode text of a basic block: `parsedOpcodes` without the offsets and the operands,
+    on a single line, e.g. "0x0: PUSH1 0x80\\n0x2: MSTORE" -> "PUSH1 MSTORE"
+    '''
+    PATTERNS = [re.compile(r'(0x)*[0-9]*: '), re.compile(r':*0x[0-9|a-f]*')]
+    SEPARATOR = '\x00'  # never matched by `PATTERNS` nor split as whitespace
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        '''
+        normalize one `parsedOpcodes` text
+        '''
+        text = text.replace('\n', ' ')
+        for pattern in OpcodeNormalizer.PATTERNS:
+            text = pattern.sub('', text)
+        return ' '.join(text.split())
+
+    @staticmethod
+    def normalizeAll(texts: list) -> list:
+        '''
+        normalize a column of `parsedOpcodes` texts with one substitution per pattern,
+        same result as `normalize` on each text
+        '''
+        if not len(texts):
+            return []
+        text = OpcodeNormalizer.SEPARATOR.join(texts).replace('\n', ' ')
+        for pattern in OpcodeNormalizer.PATTERNS:
+            text = pattern.sub('', text)
+        return [' '.join(t.split()) for t in text.split(OpcodeNormalizer.SEPARATOR)]
+
+    @staticmethod
+    def fromInstructions(instructions: list) -> str:
+        '''
+        normalized text straight from the opcode names, same result as `normalize`
+        on the default `parsedOpcodes` format
+        '''
+        return ' '.join([i.getName for i in instructions])
@@ -1,5 +1,3 @@
-import re
-from contract.Regex import Regex
 from contract.VersionChecker import VersionChecker
 
 
@@ -14,12 +12,17 @@ class Contract:
         self.constructorBinary = None
         self.childrenContracts = None
         self.metaCount = 0
+        self.metadataScan = None
         self.__parseBinary()
 
     @property
     def getRuntimeBinary(self) -> str:
         return self.runtimeBinary
 
+    @property
+    def isSolidity(self) -> bool:
+        return self.metadataScan.isSolidity
+
     def __splitMeta(self):
         '''
         split the binary using version pattern to get the meta
@@ -33,48 +36,67 @@ class Contract:
         # if the version is unknown, return
         if not self.version.isKnown:
             return
-        self.metaCount = len(re.findall(self.version.getPattern, binary))
-        match = re.search(self.version.getPattern, binary)
+        self.metaCount = self.metadataScan.getMetaCount
+        match = self.metadataScan.getFirstMatch
         if match:
-            start, end = match.span()
+            start, end = match
             self.strippedBinary = binary[:start]
             self.compilationMetadata = binary[start:]
             self.constructorRemainingData = binary[end:]
 
+    @staticmethod
+    def __splitRuntime(binary: str, markers: list, maxsplit: int = 2) -> list:
+        '''
+        same result as `re.split(Regex.RUNTIME, binary, maxsplit)`,
+        using the marker offsets found by the scan
+        '''
+        result = []
+        last = 0
+        for offset in markers[:maxsplit]:
+            result.append(binary[last:offset])
+            result.append(binary[offset + 2:offset + 4])  # captured group
+            last = offset
+        result.append(binary[last:])
+        return result
+
     def __parseBinary(self):
         '''
-        use regex to check the format and version of the contract
+        scan the binary once to check the format and version of the contract
         '''
         binary = self.binary
-        # whether it is a solidity contract
-        solidityCheck = re.search(Regex.SOLIDITY, binary)
+        # metadata trailers and runtime markers in one pass
+        self.metadataScan = VersionChecker.scan(binary)
 
         # get version information
-        # versionChecker = VersionChecker()
-        version = VersionChecker.checkVersions(binary)
-        self.version = version
+        self.version = self.metadataScan.getVersion
 
         # split the binary to filter meta data
         self.__splitMeta()
 
-        codeCount = len(re.findall(Regex.RUNTIME, binary))
+        scan = self.metadataScan
+        strippedLength = len(self.strippedBinary)
+        codeCount = len(scan.getRuntimeOffsets)
+        runtimeStart = 0  # offset of runtimeBinary in strippedBinary
         if codeCount > self.metaCount:  # constructor existed
             # split constructor and runtime
             # len(splittedStrippedBinary) == 5, if 2 (or more) patterns are found
             # len(splittedStrippedBinary) == 3, if 1 pattern is found
             # len(splittedStrippedBinary) == 1, if 0 pattern is found
-            splittedStrippedBinary = re.split(
-                Regex.RUNTIME, self.strippedBinary, 2)
+            markers = scan.getRuntimeOffsetsIn(0, strippedLength)
+            splittedStrippedBinary = Contract.__splitRuntime(
+                self.strippedBinary, markers, 2)
             # runtime will be always the last one, no matter the pattern is found or not
             self.runtimeBinary = splittedStrippedBinary[-1]
             self.constructorBinary = splittedStrippedBinary[2] if len(
                 splittedStrippedBinary) >= 5 else ''
+            runtimeStart = markers[min(len(markers), 2) - 1] if markers else 0
         else:  # constructor not existed
             self.runtimeBinary = self.strippedBinary
             self.constructorBinary = ''
         # strippedBinary = constructorBinary + runtimeBinary
 
-        splittedRuntimeBinary = re.split(Regex.RUNTIME, self.runtimeBinary, 2)
+        splittedRuntimeBinary = Contract.__splitRuntime(
+            self.runtimeBinary, scan.getRuntimeOffsetsIn(runtimeStart, strippedLength), 2)
         if len(splittedRuntimeBinary) == 5:  # if 2 (or more) patterns are found
             # children contracts existed
             self.runtimeBinary = splittedRuntimeBinary[2]
@@ -1,5 +1,6 @@
 from instructions.InstructionTable import InstructionTable
 from evm.Code import Code
+from evm.ColumnarCode import ColumnarCode
 
 
 class Disassembler:
@@ -8,6 +9,75 @@ class Disassembler:
     '''
     @staticmethod
     def disassemble(binary: str) -> Code:
+        '''
+        disassemble a hex string, decoding it once into bytes when possible
+
+        fall back to `disassembleHex` if the string is not a plain even-length hex string
+        '''
+        if str(binary).startswith("0x"):
+            binary = binary[2:]
+        data = Disassembler.__decode(binary)
+        if data is None:
+            return Disassembler.disassembleHex(binary)
+        return Disassembler.disassembleBytes(data)
+
+    @staticmethod
+    def __decode(binary: str) -> bytes:
+        '''
+        return the bytes of a plain even-length hex string, `None` otherwise
+        '''
+        try:
+            data = bytes.fromhex(binary)
+        except ValueError:
+            return None
+        if len(data) * 2 != len(binary):
+            # whitespace is skipped by `bytes.fromhex`
+            return None
+        return data
+
+    @staticmethod
+    def disassembleBytes(data: bytes) -> Code:
+        '''
+        single-pass disassembly over a `memoryview` of the raw bytecode,
+        using the precomputed decode table of `InstructionTable`
+        '''
+        table = InstructionTable.getDecodeTable()
+        view = memoryview(data)
+        size = len(view)
+        code = {}  # {offset: Instruction}
+        i = 0
+        while i < size:
+            instructionClass, opcodeObject, operandSize = table[view[i]]
+            instruction = instructionClass(i, opcodeObject)
+            j = i + 1
+            if operandSize:
+                # a truncated operand is read as it is, empty operand is 0
+                instruction.setOperand(
+                    int.from_bytes(view[j:j + operandSize], 'big'))
+                j += operandSize
+            code[i] = instruction
+            i = j
+        return Code(code)
+
+    @staticmethod
+    def disassembleColumnar(binary: str) -> ColumnarCode:
+        '''
+        disassemble a hex string into a `ColumnarCode`, instructions are created on access
+
+        accept the same strings as `disassemble`, with the same fallback to `disassembleHex`
+        '''
+        if str(binary).startswith("0x"):
+            binary = binary[2:]
+        data = Disassembler.__decode(binary)
+        if data is None:
+            return ColumnarCode.fromCode(Disassembler.disassembleHex(binary))
+        return ColumnarCode.fromBytes(data)
+
+    @staticmethod
+    def disassembleHex(binary: str) -> Code:
+        '''
+        disassemble by walking the hex string two characters at a time
+        '''
         if str(binary).startswith("0x"):
             binary = binary[2:]
         code = {}  # {offset: Instruction}
@@ -0,0 +1,73 @@
+import re
+from contract.Regex import Regex
+
+
+class MetadataScan:
+    '''
+    public class
+
+    result of `VersionChecker.scan`, everything `Contract` needs from one pass over the binary
+    - `version` (`Version`): the detected compiler version
+    - `matches` (`list`): all metadata matches as (`Version`, start, end), in order
+    - `runtimeOffsets` (`list`): start of every runtime marker `60(60|80)604052`, in order
+
+    offsets are indices in the hex string
+    '''
+    _solidity = re.compile(Regex.SOLIDITY)
+
+    def __init__(self, binary: str, version, matches: list, runtimeOffsets: list) -> None:
+        self._binary = binary
+        self._version = version
+        self._matches = matches
+        self._runtimeOffsets = runtimeOffsets
+        self._isSolidity = None
+
+    @property
+    def getVersion(self):  # -> Version
+        return self._version
+
+    @property
+    def getMatches(self) -> list:
+        return self._matches
+
+    @property
+    def getVersionMatches(self) -> list:
+        '''
+        return the (start, end) of the matches of the detected version
+        '''
+        return [(start, end) for version, start, end in self._matches if version is self._version]
+
+    @property
+    def getMetaCount(self) -> int:
+        return len(self.getVersionMatches)
+
+    @property
+    def getFirstMatch(self) -> tuple:
+        '''
+        return (start, end) of the first match of the detected version, None if not found
+        '''
+        for version, start, end in self._matches:
+            if version is self._version:
+                return (start, end)
+        return None
+
+    @property
+    def getRuntimeOffsets(self) -> list:
+        return self._runtimeOffsets
+
+    @property
+    def isSolidity(self) -> bool:
+        '''
+        whether the binary is a solidity contract, checked on first access
+        '''
+        if self._isSolidity is None:
+            self._isSolidity = bool(
+                MetadataScan._solidity.search(self._binary))
+        return self._isSolidity
+
+    def getRuntimeOffsetsIn(self, start: int, end: int) -> list:
+        '''
+        return the runtime markers lying entirely in `binary[start:end]`, relative to `start`
+        '''
+        return [o - start for o in self._runtimeOffsets
+                if o >= start and o + Regex.RUNTIME_MARKER_LENGTH <= end]
@@ -6,6 +6,9 @@ class Regex:
     SOLIDITY = r"^(73[0-9a-fA-F]{40}3014)?60(60|80)604052[0-9a-fA-F]*$"
     # Used to split runtime code
     RUNTIME = r"(?=60(60|80)604052)"
+    # The runtime marker itself, used by the single-pass scanner
+    RUNTIME_MARKER = r"60(?:60|80)604052"
+    RUNTIME_MARKER_LENGTH = 10
 
     # From version solc-0.4.17
     # 0xa1
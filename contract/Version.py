@@ -9,6 +9,7 @@ class Version:
     def __init__(self, name: str, pattern: str) -> None:
         self._name = name
         self._pattern = pattern
+        self._regex = re.compile(pattern)
 
     @property
     def getName(self) -> str:
@@ -18,6 +19,10 @@ class Version:
     def getPattern(self) -> str:
         return self._pattern
 
+    @property
+    def getRegex(self) -> re.Pattern:
+        return self._regex
+
     @property
     def isKnown(self) -> bool:
         '''
@@ -29,4 +34,4 @@ class Version:
         '''
         check the version using regex
         '''
-        return True if re.search(self._pattern, binary) else False
+        return True if self._regex.search(binary) else False
@@ -1,5 +1,12 @@
+import re
 from contract.Regex import Regex
 from contract.Version import Version
+from contract.MetadataScan import MetadataScan
+
+
+def _earlierScanners(versions: list) -> list:
+    return [None] + [re.compile('a(?:' + '|'.join(v.getPattern[1:] for v in versions[:i]) + ')')
+                     for i in range(1, len(versions))]
 
 
 class VersionChecker:
@@ -34,13 +41,80 @@ class VersionChecker:
                         Regex.SOLC_0_6_2)]
     unknownVersion = Version(UNKNOWN, '')
 
+    # one alternation over all metadata patterns plus the runtime marker,
+    # group `v<i>` is `versions[i]`.
+    # every branch starts with a literal character ('a' for the CBOR map, '6' for the marker)
+    # kept outside the groups, so the regex engine can skip ahead to candidate positions
+    RUNTIME_GROUP = 'runtime'
+    scanner = re.compile('a(?:' + '|'.join(f'(?P<v{i}>{v.getPattern[1:]})' for i, v in enumerate(versions)) +
+                         f')|6(?P<{RUNTIME_GROUP}>{Regex.RUNTIME_MARKER[1:]})')
+    # metadata patterns only, anchored by `fullmatch` at the trailer position
+    trailerScanner = re.compile('|'.join(f'(?P<v{i}>{v.getPattern})'
+                                         for i, v in enumerate(versions)))
+    # `earlierScanners[i]` finds any of `versions[:i]`, `None` for i = 0
+    earlierScanners = _earlierScanners(versions)
+
     @staticmethod
     def checkVersions(binary: str) -> Version:
         '''
         check the version of the binary
         return a Version object
+
+        the first version in `versions` found anywhere, the same as `scan`
+
+        fast path: the version of the trailer at the end of the binary,
+        if no earlier version in `versions` is found, e.g. in an embedded child contract
         '''
-        for version in VersionChecker.versions:
-            if version.checkVersion(binary):
+        version = VersionChecker.checkTrailer(binary)
+        if version is not None:
+            scanner = VersionChecker.earlierScanners[VersionChecker.versions.index(version)]
+            if scanner is None or scanner.search(binary) is None:
                 return version
-        return VersionChecker.unknownVersion
+        return VersionChecker.scan(binary).getVersion
+
+    @staticmethod
+    def checkTrailer(binary: str) -> Version:
+        '''
+        use the CBOR length in the last two bytes to locate the metadata trailer,
+        return its Version if it matches a known pattern, else None
+        '''
+        if len(binary) < 4:
+            return None
+        try:
+            length = int(binary[-4:], 16)
+        except ValueError:
+            return None
+        start = len(binary) - (length + 2) * 2
+        if start < 0:
+            return None
+        match = VersionChecker.trailerScanner.fullmatch(binary, start)
+        if match is None:
+            return None
+        return VersionChecker.versions[int(match.lastgroup[1:])]
+
+    @staticmethod
+    def scan(binary: str) -> MetadataScan:
+        '''
+        find all metadata and runtime markers in one pass, return a MetadataScan
+
+        the version is the first one in `versions` having a match,
+        the same as checking the versions one by one
+        '''
+        versions = VersionChecker.versions
+        matches = []
+        runtimeOffsets = []
+        found = set()
+        for match in VersionChecker.scanner.finditer(binary):
+            group = match.lastgroup
+            if group == VersionChecker.RUNTIME_GROUP:
+                runtimeOffsets.append(match.start())
+            else:
+                version = versions[int(group[1:])]
+                found.add(version)
+                matches.append((version, match.start(), match.end()))
+        selected = VersionChecker.unknownVersion
+        for version in versions:
+            if version in found:
+                selected = version
+                break
+        return MetadataScan(binary, selected, matches, runtimeOffsets)
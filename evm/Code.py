@@ -17,7 +17,7 @@ class Code:
 
     def __setSize(self):
         if len(self._code):
-            lastOffset, lastInstruction = list(self._code.items())[-1]
+            lastOffset, lastInstruction = next(reversed(self._code.items()))
             self._size = lastOffset + lastInstruction.getSize
         else:
             self._size = 0
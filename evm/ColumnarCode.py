@@ -0,0 +1,194 @@
+from array import array
+import bisect
+from evm.Code import Code
+from instructions.InstructionTable import InstructionTable
+from instructions.instructionSubClasses import (JumpInstruction,
+                                                JumpDestInstruction,
+                                                HaltInstruction)
+
+
+class ColumnarCode(Code):
+    '''
+    private class
+
+    `Code` stored as parallel columns, one row per instruction:
+    - `offsets` (`array('I')`): offset of the instruction
+    - `opcodes` (`array('B')`): opcode byte
+    - `operandIndices` (`array('i')`): index in the operand pool, -1 if no operand
+    - `operands` (`list`): operand pool, operands may be up to 256 bits
+
+    `Instruction` objects are created on first access and cached, so the same
+    offset always returns the same object
+    '''
+    NO_OPERAND = -1
+
+    def __init__(self, offsets: array = None, opcodes: array = None, operandIndices: array = None, operands: list = None) -> None:
+        self._offsets = offsets if offsets is not None else array('I')
+        self._opcodes = opcodes if opcodes is not None else array('B')
+        self._operandIndices = operandIndices if operandIndices is not None else array('i')
+        self._operands = operands if operands is not None else []
+        self._code = {}  # dict{int:Instruction}, created instructions
+        self._size = None
+        self.__setSize()
+
+    @staticmethod
+    def fromBytes(data: bytes):
+        '''
+        decode raw bytecode straight into columns
+        '''
+        table = InstructionTable.getDecodeTable()
+        view = memoryview(data)
+        size = len(view)
+        offsets = array('I')
+        opcodes = array('B')
+        operandIndices = array('i')
+        operands = []
+        i = 0
+        while i < size:
+            opcode = view[i]
+            operandSize = table[opcode][2]
+            offsets.append(i)
+            opcodes.append(opcode)
+            i += 1
+            if operandSize:
+                operandIndices.append(len(operands))
+                operands.append(int.from_bytes(view[i:i + operandSize], 'big'))
+                i += operandSize
+            else:
+                operandIndices.append(ColumnarCode.NO_OPERAND)
+        return ColumnarCode(offsets, opcodes, operandIndices, operands)
+
+    @staticmethod
+    def fromCode(code: Code):
+        '''
+        convert a `Code` into columns, its instruction objects are kept
+        '''
+        offsets = array('I')
+        opcodes = array('B')
+        operandIndices = array('i')
+        operands = []
+        for offset, instruction in code:
+            offsets.append(offset)
+            opcodes.append(instruction.getOpcode)
+            if instruction.hasOperand:
+                operandIndices.append(len(operands))
+                operands.append(instruction.getOperand)
+            else:
+                operandIndices.append(ColumnarCode.NO_OPERAND)
+        result = ColumnarCode(offsets, opcodes, operandIndices, operands)
+        result._code = {offset: instruction for offset, instruction in code}
+        return result
+
+    def __setSize(self):
+        if len(self._offsets):
+            operandSize = InstructionTable.getDecodeTable()[self._opcodes[-1]][2]
+            self._size = self._offsets[-1] + 1 + operandSize
+        else:
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self):
+        return ((self._offsets[row], self.getRow(row)) for row in range(len(self._offsets)))
+
+    @property
+    def getOffsets(self) -> array:
+        return self._offsets
+
+    @property
+    def getOpcodes(self) -> array:
+        return self._opcodes
+
+    def getRow(self, row: int):  # -> Instruction
+        '''
+        return the instruction of a row, create it on first access
+        '''
+        offset = self._offsets[row]
+        instruction = self._code.get(offset, None)
+        if instruction is None:
+            instructionClass, opcodeObject, _ = InstructionTable.getDecodeTable()[
+                self._opcodes[row]]
+            instruction = instructionClass(offset, opcodeObject)
+            operandIndex = self._operandIndices[row]
+            if operandIndex != ColumnarCode.NO_OPERAND:
+                instruction.setOperand(self._operands[operandIndex])
+            self._code[offset] = instruction
+        return instruction
+
+    def getRows(self, start: int, end: int) -> list:
+        return [self.getRow(row) for row in range(start, end)]
+
+    def get(self, offset: int):  # -> Instruction
+        instruction = self._code.get(offset, None)
+        if instruction is not None:
+            return instruction
+        row = bisect.bisect_left(self._offsets, offset)
+        if row == len(self._offsets) or self._offsets[row] != offset:
+            return None
+        return self.getRow(row)
+
+    def getList(self) -> list:
+        return self.getRows(0, len(self._offsets))
+
+    def getBlockRanges(self) -> list:
+        '''
+        split the rows into basic blocks using the opcode column only,
+        with the same rules as `CFG`
+
+        return a list of (start row, end row), end row excluded
+        '''
+        startOpcodes, endOpcodes = ColumnarCode.__getBoundaryOpcodes()
+        result = []
+        start = 0
+        for row, opcode in enumerate(self._opcodes):
+            if opcode in startOpcodes and row > start:
+                result.append((start, row))  # archive block
+                start = row  # new block
+            if opcode in endOpcodes:
+                result.append((start, row + 1))  # archive block
+                start = row + 1  # new block
+        if start < len(self._opcodes):
+            result.append((start, len(self._opcodes)))  # archive block
+        return result
+
+    _boundaryOpcodes = None
+
+    @staticmethod
+    def __getBoundaryOpcodes() -> tuple:
+        '''
+        return the opcodes starting and ending a basic block
+        '''
+        if ColumnarCode._boundaryOpcodes is None:
+            startOpcodes = set()
+            endOpcodes = set()
+            for opcode, (instructionClass, _, _) in enumerate(InstructionTable.getDecodeTable()):
+                if issubclass(instructionClass, JumpDestInstruction):
+                    startOpcodes.add(opcode)
+                if issubclass(instructionClass, (JumpInstruction, HaltInstruction)):
+                    endOpcodes.add(opcode)
+            ColumnarCode._boundaryOpcodes = (frozenset(startOpcodes),
+                                             frozenset(endOpcodes))
+        return ColumnarCode._boundaryOpcodes
+
+    def toBinaryString(self) -> str:
+        table = InstructionTable.getDecodeTable()
+        operands = self._operands
+        binary = []
+        for opcode, operandIndex in zip(self._opcodes, self._operandIndices):
+            binary.append(f"{opcode:02x}")
+            if operandIndex != ColumnarCode.NO_OPERAND:
+                binary.append(
+                    f"{operands[operandIndex]:0{table[opcode][2]*2}x}")
+        return ''.join(binary)
+
+    def getOpcodeSequence(self, includeOperand: bool = False) -> list:
+        if not includeOperand:
+            return self._opcodes.tolist()
+        opcodes = []
+        operands = self._operands
+        for opcode, operandIndex in zip(self._opcodes, self._operandIndices):
+            opcodes.append(opcode)
+            if operandIndex != ColumnarCode.NO_OPERAND:
+                opcodes.append(operands[operandIndex])
+        return opcodes
@@ -3,25 +3,39 @@ from evm.Variable import Variable
 
 class Memory:
     '''
-    Memory model implemented by str
+    Memory model implemented by bytearray
+
+    copies share the buffer and the variables until one of them is written
     '''
     WORD_SIZE = 32
 
     def __init__(self) -> None:
-        self._memory = ''
+        self._memory = bytearray()
         self._size = 0  # memory size in bytes, multiple of word size
         self._variables = {}  # store variable objects using offset as keys
+        # copy-on-write, `_memory` and `_variables` may be shared with other memories
+        self._sharedMemory = False
+        self._sharedVariables = False
 
     def __str__(self) -> str:
-        return self._memory
+        return self._memory.hex()
 
     @property
     def getSize(self) -> int:
         return self._size
 
     def __expansion(self, words: int = 1):
-        self._size += Memory.WORD_SIZE * words
-        self._memory += '0' * (Memory.WORD_SIZE * 2 * words)
+        zeros = bytes(Memory.WORD_SIZE * words)
+        self._size += len(zeros)
+        if self._sharedMemory:
+            self._memory = self._memory + zeros  # new buffer
+            self._sharedMemory = False
+            return
+        try:
+            self._memory.extend(zeros)
+        except BufferError:
+            # a view returned by `loadRaw` is still alive, move to a new buffer
+            self._memory = self._memory + zeros
 
     def __checkExpansion(self, offset: int, size: int = WORD_SIZE) -> bool:
         if offset + size > self._size:
@@ -32,35 +46,55 @@ class Memory:
             return True
         return False
 
+    def __ownMemory(self):
+        '''
+        copy the shared buffer before the first write
+        '''
+        if self._sharedMemory:
+            self._memory = bytearray(self._memory)
+            self._sharedMemory = False
+
+    def __ownVariables(self):
+        '''
+        copy the shared variables before the first write
+        '''
+        if self._sharedVariables:
+            self._variables = self._variables.copy()
+            self._sharedVariables = False
+
     def __intToStr(self, value: int, size: int = WORD_SIZE) -> str:
         return f"{value:0{size*2}x}"[:size*2]
 
-    def loadRaw(self, offset: int, size: int = WORD_SIZE) -> str:
+    def __intToBytes(self, value: int, size: int = WORD_SIZE) -> bytes:
+        if 0 <= value < 1 << (size * 8):
+            return value.to_bytes(size, 'big')
+        # too large: keep the leading digits, as the string model did
+        return bytes.fromhex(self.__intToStr(value, size))
+
+    def loadRaw(self, offset: int, size: int = WORD_SIZE) -> memoryview:
         '''
-        Load raw data from memory with specific offset and size, return string
+        Load raw data from memory with specific offset and size, return a zero-copy view
+
+        the view follows the writes of this memory, release it before keeping it longer
         '''
         self.__checkExpansion(offset, size)
-        data = self._memory[offset*2:(offset+size)*2]
-        return data
+        return memoryview(self._memory)[offset:offset+size]
 
     def loads(self, offset: int) -> int:
         self.__checkExpansion(offset)
-        data = self._memory[offset*2:(offset+Memory.WORD_SIZE)*2]
-        return int(data, 16)
+        return int.from_bytes(self._memory[offset:offset+Memory.WORD_SIZE], 'big')
 
     def stores(self, offset: int, value: int, size: int = WORD_SIZE) -> bool:
         self.__checkExpansion(offset, size)
-        self._memory = self._memory[:offset*2] + \
-            self.__intToStr(value, size) + \
-            self._memory[(offset+size)*2:]
+        self.__ownMemory()
+        self._memory[offset:offset+size] = self.__intToBytes(value, size)
         return True
 
     def copys(self, dest: int, offset: int, size: int) -> bool:
         self.__checkExpansion(offset, size)
         self.__checkExpansion(dest, size)
-        self._memory = self._memory[:dest*2] + \
-            self._memory[offset*2:(offset+size)*2] + \
-            self._memory[(dest+size)*2:]
+        self.__ownMemory()
+        self._memory[dest:dest+size] = self._memory[offset:offset+size]
         return True
 
     def load(self, offset: Variable) -> Variable:
@@ -81,18 +115,51 @@ class Memory:
         else:
             return Variable()
 
+    def setType(self, offset: Variable, type: str) -> bool:
+        '''
+        set the type of the variable stored at `offset`, the variable may be shared
+        with copies of this memory, so a typed copy of it replaces it
+        '''
+        if not offset.hasValue:
+            return False
+        variable = self._variables.get(offset.getValue)
+        if variable is None or not variable.hasValue or variable.getValue != self.loads(offset.getValue):
+            # `load` returns a new variable, no type to keep
+            return False
+        result = variable.copy()
+        result.setType(type)
+        self.__ownVariables()
+        self._variables[offset.getValue] = result
+        return True
+
     def store(self, offset: Variable, value: Variable, size: int = WORD_SIZE) -> bool:
         if offset.hasValue:  # valid offset
             if value.hasValue:  # valid offset and value
                 self.stores(offset.getValue, value.getValue, size)
+            self.__ownVariables()
             self._variables[offset.getValue] = value
             return True
         elif offset.hasType:  # valid offset type
+            self.__ownVariables()
             self._variables[offset.getType] = value
             return True
         else:
             return False
 
+    def copy(self):
+        '''
+        O(1) copy, the buffer and the variables are shared until written
+        '''
+        self._sharedMemory = True
+        self._sharedVariables = True
+        result = Memory()
+        result._memory = self._memory
+        result._size = self._size
+        result._variables = self._variables
+        result._sharedMemory = True
+        result._sharedVariables = True
+        return result
+
     def getCost(self) -> int:
         # ceildiv
         sizeWord = (self._size + Memory.WORD_SIZE - 1) // Memory.WORD_SIZE
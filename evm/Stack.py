@@ -11,6 +11,7 @@ class Stack:
 
     def __init__(self, stack: list = None) -> None:
         self._stack = stack if stack is not None else []
+        self._shared = False  # copy-on-write, `_stack` may be shared with other stacks
 
     @property
     def getLength(self):
@@ -32,23 +33,45 @@ class Stack:
                 return False
         return True
 
+    def __hash__(self) -> int:
+        return hash(self.getFingerprint)
+
+    @property
+    def getFingerprint(self) -> tuple:
+        '''
+        return the resolved values of the items, bottom first, None for unknown values
+
+        two stacks are equal if and only if their fingerprints are equal
+        '''
+        return tuple(item.getValue for item in self._stack)
+
     def __checkUnderflow(self, count: int = 1) -> bool:
         return self.getLength - count < 0
 
     def __checkOverflow(self, count: int = 1) -> bool:
         return self.getLength + count > Stack.LIMIT
 
+    def __own(self):
+        '''
+        copy the shared list before the first mutation
+        '''
+        if self._shared:
+            self._stack = self._stack.copy()
+            self._shared = False
+
     def pop(self, index: int = -1):
         if self.__checkUnderflow():
             # TODO: Error handler
             print('Error: Stack Underflow Error.')
             return None
+        self.__own()
         return self._stack.pop(index)
 
     def push(self, item):
         if self.__checkOverflow():
             # TODO: Error handler
             print('Warning: Stack Overflow Error.')
+        self.__own()
         self._stack.append(item)
 
     def pops(self, count: int) -> list:
@@ -87,4 +110,10 @@ class Stack:
         return result
 
     def copy(self):
-        return Stack(self._stack.copy())
+        '''
+        O(1) copy, the items are shared until one of the stacks is mutated
+        '''
+        self._shared = True
+        result = Stack(self._stack)
+        result._shared = True
+        return result
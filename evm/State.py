@@ -3,7 +3,6 @@ from evm.Code import Code
 from evm.Stack import Stack
 from evm.Memory import Memory
 from evm.Storage import Storage
-from copy import deepcopy
 
 
 class State:
@@ -26,11 +25,24 @@ class State:
         # ignore code and gas
         return self.pc == other.pc and self.stack == other.stack
 
+    def __hash__(self) -> int:
+        return hash(self.getFingerprint)
+
+    @property
+    def getFingerprint(self) -> tuple:
+        '''
+        return a hashable key consistent with `__eq__`: (pc, resolved values of stack)
+        '''
+        return (self.pc, self.stack.getFingerprint)
+
     def getNext(self):
         return self.code.get(self.pc)
 
     def copy(self):
         '''
-        return a copy State, only Code object is shared
+        return a copy State in O(1), the Code object is shared,
+        stack, memory and storage are copied on write
+
+        the `Variable` objects are shared, changes are made to copies of them (`Memory.setType`)
         '''
-        return State(self.code, self.pc, deepcopy(self.stack), self.insStack.copy(), deepcopy(self.memory), deepcopy(self.storage), self.gas)
+        return State(self.code, self.pc, self.stack.copy(), self.insStack.copy(), self.memory.copy(), self.storage.copy(), self.gas)
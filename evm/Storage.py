@@ -1,13 +1,17 @@
+from collections import ChainMap
 from evm.Variable import Variable
 
 
 class Storage:
     '''
-    Storage model implemented by dict
+    Storage model implemented by an overlay of dicts
+
+    each copy writes to its own dict on top of the shared ones
     '''
+    MAX_DEPTH = 16  # flatten the overlays beyond this depth
 
-    def __init__(self) -> None:
-        self._storage = {}
+    def __init__(self, storage: ChainMap = None) -> None:
+        self._storage = storage if storage is not None else ChainMap()
 
     def load(self, key: Variable) -> Variable:
         if key.hasValue:  # valid value
@@ -26,3 +30,13 @@ class Storage:
             return True
         else:
             return False
+
+    def copy(self):
+        '''
+        O(1) copy, both storages continue on a new overlay and share the current ones
+        '''
+        shared = self._storage
+        if len(shared.maps) > Storage.MAX_DEPTH:
+            shared = ChainMap(dict(shared))
+        self._storage = shared.new_child()
+        return Storage(shared.new_child())
@@ -41,6 +41,24 @@ class Variable(object):
     def setType(self, type: str):
         self._type = type
 
+    def copy(self):
+        '''
+        return a copy with the same value, type and sources,
+        for the changes of a variable shared between states
+        '''
+        result = Variable(self._value, self._type)
+        result._source = self._source.copy()
+        return result
+
+    def __getstate__(self) -> tuple:
+        '''
+        pickle as a tuple, e.g. the annotations sent by the processes of `CFG.buildCFG`
+        '''
+        return self._value, self._type, self._source
+
+    def __setstate__(self, state: tuple):
+        self._value, self._type, self._source = state
+
     def addSource(self, source):
         '''
         add variable to the source list, and propagate the type
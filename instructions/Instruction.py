@@ -108,6 +108,23 @@ class Instruction(object):
     def getNextOffset(self):
         return self._offset + self.getSize
 
+    def getAnnotation(self) -> tuple:
+        '''
+        return what the last execution left in this instruction, the arguments by their offsets,
+        e.g. to send it to another process, see `setAnnotation`
+        '''
+        return self._stackInput, self._stackOutput, [argument.getOffset for argument in self._arguments]
+
+    def setAnnotation(self, annotation: tuple, code):
+        '''
+        set what an execution left in this instruction, from `getAnnotation`
+        - `code` (`Code`): the code of the arguments
+        '''
+        stackInput, stackOutput, arguments = annotation[:3]
+        self._stackInput = stackInput
+        self._stackOutput = stackOutput
+        self._arguments = [code.get(offset) for offset in arguments]
+
     def __str__(self) -> str:
         '''
         defualt string format
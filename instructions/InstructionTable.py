@@ -160,14 +160,40 @@ class InstructionTable:
         0xff: (SELFDESTRUCT,    Opcode(0xff, 'SELFDESTRUCT',    0,  1,  0,  5000,   "Halt execution and register account for later deletion."))
     }
 
+    # opcode: (Instruction, Opcode, operand size), one entry per byte value
+    _decodeTable = None
+
+    @staticmethod
+    def getDecodeTable() -> list:
+        '''
+        return the 256-entry decode table, built once and shared
+
+        entry: (Instruction class, shared Opcode object, operand size)
+        '''
+        if InstructionTable._decodeTable is None:
+            table = []
+            for opcode in range(256):
+                unknownOpcode = Opcode(opcode, 'UNKNOWN', 0, 0, 0, 0,
+                                       'unknown opcode')
+                instruction, opcodeObject = InstructionTable._instructionTable.get(
+                    opcode, (UNKNOWN, unknownOpcode))
+                table.append(
+                    (instruction, opcodeObject, opcodeObject.operandSize))
+            InstructionTable._decodeTable = table
+        return InstructionTable._decodeTable
+
     @staticmethod
     def select(opcode: int, offset: int = 0) -> Instruction:
         '''
         select instruction by opcode
         '''
-        unknownOpcode = Opcode(opcode, 'UNKNOWN', 0, 0, 0, 0, 'unknown opcode')
-        instruction, opcodeObject = InstructionTable._instructionTable.get(
-            opcode, (UNKNOWN, unknownOpcode))
+        if 0 <= opcode < 256:
+            instruction, opcodeObject, _ = InstructionTable.getDecodeTable()[
+                opcode]
+        else:
+            instruction = UNKNOWN
+            opcodeObject = Opcode(opcode, 'UNKNOWN', 0, 0, 0, 0,
+                                  'unknown opcode')
         return instruction(offset, opcodeObject)
 
     @staticmethod
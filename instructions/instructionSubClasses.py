@@ -69,6 +69,17 @@ class JumpInstruction(Instruction):
             if isinstance(state.code.get(pc), JumpDestInstruction):
                 self.setDestination(pc)
 
+    def getAnnotation(self) -> tuple:
+        return super().getAnnotation() + (self._destination,)
+
+    def setAnnotation(self, annotation: tuple, code):
+        '''
+        an unsolved destination does not replace a solved one
+        '''
+        super().setAnnotation(annotation, code)
+        if annotation[3] is not None:
+            self.setDestination(annotation[3])
+
     def toStringWithArgument(self) -> str:
         return super().toStringWithArgument() + ((' ' + hex(self.getDestination)) if self.hasSolvedDestination else ' ?')
 
@@ -116,17 +127,16 @@ class CallInstruction(MemoryInstruction):
         # TODO: calculate the gas
         super().execute(state)
 
-    def __parseSignature(self, callData: str):
+    def __parseSignature(self, callData: memoryview):
         '''
         parse call data to extract function signature, 
         including function name and signature.
-        - `callData` (`str`): raw call data loaded from Memory, 
-        a bytecode string not starting with '0x'.
+        - `callData` (`memoryview`): raw call data loaded from Memory.
         '''
-        if len(callData) < 8:
+        if len(callData) < 4:
             # no valid function selector
             return
-        selector = callData[:8].lower()
+        selector = callData[:4].hex()
         signature = CallInstruction.signatureTable[selector]
         self.selector = selector
         self.signature = signature
@@ -142,8 +152,7 @@ class CallInstruction(MemoryInstruction):
         for parameterType in parameters:
             if offset+32-inputOffset > inputSize:
                 break
-            variable = state.memory.load(Variable(offset))
-            variable.setType(parameterType)
+            state.memory.setType(Variable(offset), parameterType)
             offset += 32
 
     def callFunction(self, state: State, inputOffset: int, inputSize: int, outputOffset: int, outputSize: int):
@@ -151,8 +160,8 @@ class CallInstruction(MemoryInstruction):
         core logic of function call
         '''
         if inputOffset is not None and inputSize is not None:
-            callData = state.memory.loadRaw(inputOffset, inputSize)
-            self.__parseSignature(callData)
+            with state.memory.loadRaw(inputOffset, inputSize) as callData:
+                self.__parseSignature(callData)
             self.__typeInference(state, inputOffset, inputSize)
         if outputOffset is not None and outputSize is not None:
             # dummy return value
@@ -160,6 +169,18 @@ class CallInstruction(MemoryInstruction):
             state.memory.store(Variable(outputOffset),
                                returnValue, size=outputSize)
 
+    def getAnnotation(self) -> tuple:
+        return super().getAnnotation() + (self.selector,)
+
+    def setAnnotation(self, annotation: tuple, code):
+        '''
+        a call without a selector does not replace a parsed one
+        '''
+        super().setAnnotation(annotation, code)
+        if annotation[3] is not None:
+            self.selector = annotation[3]
+            self.signature = CallInstruction.signatureTable[self.selector]
+
     def toStringWithArgument(self) -> str:
         result = super().toStringWithArgument()
         if self.signature:
@@ -0,0 +1,143 @@
+'''
+Multi-label detector: one DeepGraphCNN trunk, one sigmoid output per vulnerability,
+trained on `Dataset.mulHotLabels`
+
+    python multiLabel.py train
+    python multiLabel.py evaluate
+    python multiLabel.py predict
+
+`predict` writes per-vulnerability logs like `test.py`, with a single forward pass per graph,
+into `LOGPATH`, apart from the logs of the per-vulnerability detectors.
+
+There is no USE model of its own, the block texts are embedded with the USE model at `USEPATH`,
+by default the one shipped with the first detector, `models/SC2/<vulnerability>/USE/`.
+A model trained with one USE model must be evaluated and used with the same one.
+'''
+from stellargraph.mapper import PaddedGraphGenerator
+from GCNModel import GCNModel
+from Corpus import Corpus
+import tensorflow as tf
+import numpy as np
+import json
+import test
+
+MODELPATH = f'{test.MODELBASE}{test.MODEL}/multi-label/'
+USEPATH = f'{test.MODELPATH}{test.VULS[0]}/USE/'  # block text encoder, any detector's USE, train and predict with the same one
+LOGPATH = f'{test.LOGPATH}multi-label/'
+LABELS = 'labels.json'
+EPOCHS = 100
+BATCHSIZE = 32
+TESTRATIO = 0.2
+THRESHOLD = 0.5
+SEED = 0
+
+
+def getLabelMatrix(dataset) -> tuple:
+    '''
+    return (label names, multi-hot matrix) of a `Dataset` or a `Corpus`
+    '''
+    if isinstance(dataset, Corpus):
+        return dataset.getLabelNames, np.asarray(dataset.getLabels, dtype=np.float32)
+    return list(dataset.labels.keys()), np.asarray(dataset.mulHotLabels, dtype=np.float32)
+
+
+def getAllGraphs(dataset, embed) -> list:
+    if isinstance(dataset, Corpus):
+        return test.getGraphsFromCorpus(dataset, list(dataset), embed)
+    return test.getGraphs(dataset.graphs, embed)
+
+
+def split(count: int) -> tuple:
+    '''
+    return (train indices, test indices), shuffled with `SEED`
+    '''
+    indices = np.random.default_rng(SEED).permutation(count)
+    testSize = int(count * TESTRATIO)
+    return indices[testSize:], indices[:testSize]
+
+
+def flow(graphs: list, targets: np.ndarray = None, shuffle: bool = False):
+    gen = PaddedGraphGenerator(graphs=graphs)
+    return gen.flow(graphs,
+                    targets=targets,
+                    batch_size=BATCHSIZE,
+                    symmetric_normalization=test.SYMMETRIC,
+                    weighted=test.WEIGHTED,
+                    shuffle=shuffle
+                    )
+
+
+def loadModel() -> GCNModel:
+    with open(MODELPATH + LABELS) as fp:
+        labels = json.load(fp)
+    return GCNModel(model=tf.keras.models.load_model(MODELPATH + 'GCN/'), labels=labels)
+
+
+def getEmbedder():
+    return test.getEmbedder(test.getUSEmodel(USEPATH), USEPATH)
+
+
+def train():
+    dataset = test.loadDataset()
+    labels, y = getLabelMatrix(dataset)
+    graphs = getAllGraphs(dataset, getEmbedder())
+    trainIndices, testIndices = split(len(graphs))
+    trainGraphs = [graphs[i] for i in trainIndices]
+    testGraphs = [graphs[i] for i in testIndices]
+    model = GCNModel(trainGraphs, labels=labels)
+    model.compile()
+    model.fit(flow(trainGraphs, y[trainIndices], shuffle=True), epochs=EPOCHS, verbose=1,
+              validation_data=flow(testGraphs, y[testIndices]) if len(testGraphs) else None)
+    model.save(MODELPATH + 'GCN/')
+    with open(MODELPATH + LABELS, 'w') as fp:
+        json.dump(labels, fp)
+    print('saved: ', MODELPATH)
+
+
+def evaluate():
+    dataset = test.loadDataset()
+    labels, y = getLabelMatrix(dataset)
+    _, testIndices = split(len(dataset))
+    model = loadModel()
+    graphs = getAllGraphs(dataset, getEmbedder())
+    testGraphs = [graphs[i] for i in testIndices]
+    scores = model.predictLabels(flow(testGraphs))
+    print(f'{"vulnerability":>24} {"acc":>6} {"prec":>6} {"rec":>6} {"f1":>6}')
+    for label in model.labels:
+        truth = y[testIndices, labels.index(label)] >= THRESHOLD
+        predicted = scores[label] >= THRESHOLD
+        tp = np.sum(truth & predicted)
+        precision = tp / max(np.sum(predicted), 1)
+        recall = tp / max(np.sum(truth), 1)
+        f1 = 2 * precision * recall / max(precision + recall, 1e-12)
+        accuracy = np.mean(truth == predicted) if len(truth) else 0.0
+        print(f'{label:>24} {accuracy:6.3f} {precision:6.3f} {recall:6.3f} {f1:6.3f}')
+
+
+def predict():
+    dataset = test.loadDataset()
+    model = loadModel()
+    embed = getEmbedder()
+    y_hat = {label: [] for label in model.labels}
+    for chunk in dataset.chunks(test.CHUNKSIZE):
+        if isinstance(dataset, Corpus):
+            graphs = test.getGraphsFromCorpus(dataset, chunk, embed)
+        else:
+            graphs = test.getGraphs(chunk, embed)
+        scores = model.predictBucketed(graphs, test.BUCKETNODES,
+                                       symmetric_normalization=test.SYMMETRIC,
+                                       weighted=test.WEIGHTED)
+        for i, label in enumerate(model.labels):
+            y_hat[label].append(scores[:, i])
+    for label, scores in y_hat.items():
+        test.dumpResult(label, np.concatenate(scores) if len(scores) else np.array([]), LOGPATH)
+    print('done')
+
+
+if __name__ == '__main__':
+    import sys
+    commands = {'train': train, 'evaluate': evaluate, 'predict': predict}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(f'usage: python {sys.argv[0]} {"|".join(commands)}')
+        sys.exit(1)
+    commands[sys.argv[1]]()
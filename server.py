@@ -0,0 +1,314 @@
+'''
+Local inference service keeping the vulnerability detectors loaded
+
+    python server.py [--port 8000] [--vuls reentrancy-eth tx-origin ...] [--max-seconds 30]
+
+    POST /predict {"bytecode": "0x..."}
+    POST /predict {"bytecodes": ["0x...", ...]}
+    POST /predict {"graphs": [<CFG.toArrays result as lists>, ...]}
+    GET  /health
+    GET  /stats
+
+Each contract is analysed once, within an exploration budget, the normalized block texts
+are shared by all detectors, and concurrent requests are grouped into micro-batches
+by a single model thread. A batch that fails is predicted again graph by graph.
+The response holds the scores per vulnerability and the latency per stage in seconds.
+'''
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from GCNModel import GCNModel
+from cfg.Budget import ExplorationBudget
+import tensorflow as tf
+import numpy as np
+import json
+import os
+import queue
+import threading
+import time
+import batch
+import Embedding
+import GraphArrays
+import test
+
+ARRAY_TYPES = {'nodeOffsets': np.int32,
+               'edgeFrom': np.int32,
+               'edgeTo': np.int32,
+               'edgeWeight': np.float32,
+               'tokens': np.uint8,
+               'tokenOffsets': np.int32}
+
+
+class Detector:
+    '''
+    public class
+
+    USE and GCN models of one vulnerability, loaded once
+    '''
+
+    def __init__(self, vul: str, modelPath: str = test.MODELPATH) -> None:
+        self.vul = vul
+        usePath = modelPath + vul + '/USE/'
+        self.USEmodel = test.getUSEmodel(usePath)
+        self.embed = test.getEmbedder(self.USEmodel, usePath)
+        self.GCNmodel = GCNModel(model=tf.keras.models.load_model(modelPath + vul + '/GCN/'))
+
+    def predict(self, arraysList: list, textsList: list) -> tuple:
+        '''
+        return (scores, embedding seconds, prediction seconds) of a batch of graphs
+        '''
+        start = time.perf_counter()
+        embeddings = Embedding.embedGraphs(textsList, self.embed)
+        graphs = [GraphArrays.toStellarGraph(arrays, features, test.WEIGHTED)
+                  for arrays, features in zip(arraysList, embeddings)]
+        embedded = time.perf_counter()
+        scores = self.GCNmodel.predictBucketed(graphs, test.BUCKETNODES,
+                                               symmetric_normalization=test.SYMMETRIC,
+                                               weighted=test.WEIGHTED).ravel()
+        return scores, embedded - start, time.perf_counter() - embedded
+
+
+class InferenceServer:
+    '''
+    public class
+
+    - `maxBatch` (`int`): graphs predicted together at most
+    - `maxWait` (`float`): seconds the model thread waits for more graphs after the first one
+    - `budgetOptions` (`dict`): parameters of the `ExplorationBudget` of each contract, unlimited if `None`
+    '''
+
+    def __init__(self, vuls: list, maxBatch: int = 32, maxWait: float = 0.01, graph: str = 'combined',
+                 budgetOptions: dict = None) -> None:
+        self.maxBatch = maxBatch
+        self.maxWait = maxWait
+        self.graph = graph
+        self.budgetOptions = budgetOptions
+        self.detectors = []
+        for vul in vuls:
+            if not os.path.isdir(test.MODELPATH + vul):
+                print(f'Warning: path not found: {test.MODELPATH + vul}')
+                continue
+            self.detectors.append(Detector(vul))
+            print('loaded: ', vul)
+        self._queue = queue.Queue()
+        self._statsLock = threading.Lock()
+        self._stats = {'requests': 0, 'graphs': 0, 'batches': 0}
+        self._stageSeconds = {}
+        self._worker = threading.Thread(target=self.__work, daemon=True)
+        self._worker.start()
+
+    @property
+    def getStats(self) -> dict:
+        with self._statsLock:
+            result = dict(self._stats)
+            result['meanSeconds'] = {stage: seconds / max(self._stats['graphs'], 1)
+                                     for stage, seconds in self._stageSeconds.items()}
+        return result
+
+    def __record(self, latency: dict):
+        with self._statsLock:
+            self._stats['graphs'] += 1
+            for stage, seconds in latency.items():
+                self._stageSeconds[stage] = self._stageSeconds.get(stage, 0.0) + seconds
+
+    def analyze(self, binary: str) -> dict:
+        '''
+        bytecode to the arrays of the graph, once for all detectors,
+        the graph is partial when the exploration budget is exhausted
+        '''
+        budget = ExplorationBudget(**self.budgetOptions) if self.budgetOptions else None
+        return batch.buildGraph(binary, self.graph, budget=budget).toArrays()
+
+    def predict(self, arraysList: list, latencies: list = None) -> list:
+        '''
+        score graphs with all detectors, block until the model thread is done,
+        return one result per graph, a `None` graph is reported as failed
+        '''
+        latencies = latencies or [{} for _ in arraysList]
+        tasks = []
+        for arrays, latency in zip(arraysList, latencies):
+            task = {'latency': latency, 'done': threading.Event()}
+            if arrays is None:
+                task['error'] = latency.pop('error', 'no graph')
+                task['done'].set()
+            elif not len(arrays['nodeOffsets']):
+                task['error'] = 'empty graph'
+                task['done'].set()
+            else:
+                task['arrays'] = arrays
+                task['queued'] = time.perf_counter()
+                self._queue.put(task)
+            tasks.append(task)
+        results = []
+        for task in tasks:
+            task['done'].wait()
+            if 'error' in task:
+                results.append({'error': task['error'], 'latency': task['latency']})
+                continue
+            self.__record(task['latency'])
+            results.append({'scores': task['scores'],
+                            'batchSize': task['batchSize'],
+                            'latency': task['latency']})
+        with self._statsLock:
+            self._stats['requests'] += 1
+        return results
+
+    def __nextBatch(self) -> list:
+        tasks = [self._queue.get()]
+        deadline = time.perf_counter() + self.maxWait
+        while len(tasks) < self.maxBatch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                tasks.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return tasks
+
+    def __predictTasks(self, tasks: list):
+        '''
+        score the graphs of `tasks` together with all detectors, raise on failure
+        '''
+        for task in tasks:
+            task['scores'] = {}
+        arraysList = [task['arrays'] for task in tasks]
+        normalized = time.perf_counter()
+        textsList = [GraphArrays.getNodeTexts(arrays) for arrays in arraysList]
+        normalized = time.perf_counter() - normalized
+        embedSeconds = predictSeconds = 0.0
+        for detector in self.detectors:
+            scores, embedded, predicted = detector.predict(arraysList, textsList)
+            embedSeconds += embedded
+            predictSeconds += predicted
+            for task, score in zip(tasks, scores):
+                task['scores'][detector.vul] = float(score)
+        for task in tasks:
+            task['latency']['normalize'] = normalized
+            task['latency']['embed'] = embedSeconds
+            task['latency']['predict'] = predictSeconds
+
+    def __work(self):
+        while True:
+            tasks = self.__nextBatch()
+            start = time.perf_counter()
+            for task in tasks:
+                task['latency']['queue'] = start - task['queued']
+                task['batchSize'] = len(tasks)
+            try:
+                self.__predictTasks(tasks)
+            except Exception:
+                # one graph may fail the whole batch, predict them one by one
+                for task in tasks:
+                    try:
+                        self.__predictTasks([task])
+                    except Exception as e:
+                        task['error'] = f'{type(e).__name__}: {e}'
+            with self._statsLock:
+                self._stats['batches'] += 1
+            for task in tasks:
+                task['done'].set()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'SC2'
+    inference = None  # InferenceServer, set by `main`
+
+    def __reply(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.__reply(200, {'vuls': [d.vul for d in self.inference.detectors]})
+        elif self.path == '/stats':
+            self.__reply(200, self.inference.getStats)
+        else:
+            self.__reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.__reply(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length))
+            if 'graphs' in body:
+                arraysList = []
+                latencies = []
+                for graph in body['graphs']:
+                    try:
+                        arrays = {name: np.asarray(graph[name], dtype=dtype)
+                                  for name, dtype in ARRAY_TYPES.items()}
+                        GraphArrays.checkArrays(arrays)
+                        arraysList.append(arrays)
+                        latencies.append({})
+                    except (ValueError, KeyError, TypeError, OverflowError) as e:  # reported per graph
+                        arraysList.append(None)
+                        latencies.append({'error': f'{type(e).__name__}: {e}'})
+            else:
+                binaries = body['bytecodes'] if 'bytecodes' in body else [body['bytecode']]
+                arraysList = []
+                latencies = []
+                for binary in binaries:
+                    start = time.perf_counter()
+                    try:
+                        arraysList.append(self.inference.analyze(binary))
+                        latencies.append({'analyze': time.perf_counter() - start})
+                    except Exception as e:  # reported per contract
+                        arraysList.append(None)
+                        latencies.append({'analyze': time.perf_counter() - start,
+                                          'error': f'{type(e).__name__}: {e}'})
+        except (ValueError, KeyError, TypeError) as e:
+            self.__reply(400, {'error': f'{type(e).__name__}: {e}'})
+            return
+        results = self.inference.predict(arraysList, latencies)
+        if 'graphs' in body or 'bytecodes' in body:
+            self.__reply(200, {'results': results})
+        else:
+            self.__reply(200, results[0])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv: list = None):
+    import argparse
+    parser = argparse.ArgumentParser(description='serve the vulnerability detectors')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--vuls', nargs='+', default=test.VULS)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-wait', type=float, default=0.01,
+                        help='seconds to wait for more requests before a batch')
+    parser.add_argument('--graph', choices=batch.GRAPHS, default='combined')
+    parser.add_argument('--max-seconds', type=float, default=30.0,
+                        help='CFG exploration deadline per contract, the graph is partial when reached')
+    parser.add_argument('--max-instructions', type=int, default=None,
+                        help='executed instructions allowed per CFG exploration')
+    parser.add_argument('--max-states', type=int, default=None,
+                        help='forked states allowed per CFG exploration')
+    parser.add_argument('--max-memory', type=int, default=None,
+                        help='resident memory in MiB allowed during CFG exploration')
+    args = parser.parse_args(argv)
+    budgetOptions = {'seconds': args.max_seconds,
+                     'maxInstructions': args.max_instructions,
+                     'maxStates': args.max_states,
+                     'maxMemory': args.max_memory and args.max_memory * 2**20}
+    if all(value is None for value in budgetOptions.values()):
+        budgetOptions = None
+    RequestHandler.inference = InferenceServer(args.vuls, args.max_batch, args.max_wait, args.graph,
+                                               budgetOptions)
+    httpd = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    print(f'serving on http://{args.host}:{args.port}')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
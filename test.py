@@ -1,10 +1,16 @@
-from stellargraph.mapper import PaddedGraphGenerator
 from stellargraph import StellarDiGraph
+from GCNModel import GCNModel
 from Dataset import Dataset
+from Corpus import Corpus
+from EmbeddingCache import EmbeddingCache
+from ResultStore import ResultStore
+import GraphArrays
+import Embedding
 import tensorflow as tf
 import tensorflow_hub as hub
 import pandas as pd
 import numpy as np
+import hashlib
 import gc
 import os
 
@@ -27,6 +33,13 @@ DATATYPE = ['pla', 'obf'][0]
 LOGPATH = f'logs/{MODEL}/'
 WEIGHTED = True
 SYMMETRIC = False
+STREAMING = True  # index the dataset file, build graphs on demand
+CHUNKSIZE = 1024  # graphs embedded and predicted at once
+CORPUS = None  # directory of a binary corpus built by Corpus.py, used instead of DATASET if set
+EMBEDDINGCACHE = 'cache/embeddings.sqlite'  # block embeddings kept across runs, None to disable
+EMBEDBATCH = 1024  # block texts per USE model call
+BUCKETNODES = 8192  # padded nodes per prediction batch, graphs are bucketed by size
+RESULTSTORE = f'{LOGPATH}results.jsonl'  # scores kept across runs, only missing ones computed, None to disable
 
 
 def getUSEmodel(path):
@@ -40,16 +53,47 @@ def getUSEmodel(path):
     return model
 
 
-def getGraphs(dataset: Dataset, USEmodel):
-    graphs = []
-    for gnx, nodeindices, features in dataset.graphs:
+_embeddingCache = None
+
+
+def getEmbeddingCache() -> EmbeddingCache:
+    global _embeddingCache
+    if _embeddingCache is None:
+        _embeddingCache = EmbeddingCache(EMBEDDINGCACHE)
+    return _embeddingCache
+
+
+def getEmbedder(USEmodel, usePath=None):
+    '''
+    return a function embedding a list of block texts into a (len, dim) array,
+    in batches of `EMBEDBATCH` texts,
+    through the embedding cache if `usePath` is given and `EMBEDDINGCACHE` is set
+    '''
+    def run(batch):
+        return np.array(USEmodel(tf.convert_to_tensor(batch)))
+
+    def embed(texts):
         tf.random.set_seed(seed=0)
-        nodefeatures = USEmodel(tf.convert_to_tensor(features))
-        nodefeatures = (np.array(nodefeatures)).T
-        d = {}
-        for i, nodefeature in enumerate(nodefeatures):
-            d["f{0}".format(i)] = nodefeature
-        node_features = pd.DataFrame(d, index=nodeindices)
+        return Embedding.embedInBatches(texts, run, EMBEDBATCH)
+
+    if usePath is None or EMBEDDINGCACHE is None:
+        return embed
+    cache = getEmbeddingCache()
+    digest = EmbeddingCache.modelDigest(usePath)
+    return lambda texts: cache.embed(texts, digest, embed)
+
+
+def getGraphs(items, embed):
+    '''
+    - `items`: iterable of (graph, nodeindices, features), e.g. `Dataset.graphs` or a chunk of it
+    - `embed`: see `getEmbedder`, called once for the distinct texts of all `items`
+    '''
+    items = list(items)
+    embeddings = Embedding.embedGraphs([features for _, _, features in items], embed)
+    graphs = []
+    for (gnx, nodeindices, _), nodefeatures in zip(items, embeddings):
+        node_features = pd.DataFrame(nodefeatures, index=nodeindices,
+                                     columns=[f"f{i}" for i in range(nodefeatures.shape[1])])
         graph = StellarDiGraph.from_networkx(gnx,
                                              node_features=node_features,
                                              node_type_default="basic block",
@@ -59,35 +103,106 @@ def getGraphs(dataset: Dataset, USEmodel):
     return graphs
 
 
-def predict(vul, dataset):
+def getGraphsFromArrays(items, embed):
+    '''
+    - `items`: iterable of `CFG.toArrays` results, no json nor networkx involved
+    '''
+    items = list(items)
+    embeddings = Embedding.embedGraphs(
+        [GraphArrays.getNodeTexts(arrays) for arrays in items], embed)
+    graphs = []
+    for arrays, nodefeatures in zip(items, embeddings):
+        graph = GraphArrays.toStellarGraph(arrays, nodefeatures, WEIGHTED)
+        graphs.append(graph)
+    return graphs
+
+
+def getGraphsFromCorpus(corpus: Corpus, items, embed):
+    '''
+    - `items`: graphs of `corpus`, each distinct block text is embedded once
+    '''
+    textIds = np.unique(np.concatenate([graph['textIds'] for graph in items]))
+    vocabulary = corpus.getVocabulary
+    embeddings = embed([vocabulary[i] for i in textIds.tolist()])
+    graphs = []
+    for arrays in items:
+        nodefeatures = embeddings[np.searchsorted(textIds, arrays['textIds'])]
+        graph = GraphArrays.toStellarGraph(arrays, nodefeatures, WEIGHTED)
+        graphs.append(graph)
+    return graphs
+
+
+def loadDataset():
+    if CORPUS is not None:
+        return Corpus(CORPUS)
+    return Dataset(DATASET, WEIGHTED, STREAMING)
+
+
+def getContractKeys(dataset) -> list:
+    '''
+    return the `ResultStore` key of each graph, the hash of the model input graph
+    '''
+    keys = []
+    if isinstance(dataset, Corpus):
+        for arrays in dataset:
+            offsets = arrays['nodeOffsets']
+            source, target, weight = GraphArrays.getEdges(arrays)
+            keys.append(ResultStore.hashGraph(offsets, dataset.getNodeTexts(arrays),
+                                              zip(offsets[source], offsets[target], weight)))
+        return keys
+    for gnx, nodeindices, features in dataset.graphs:
+        edges = [(u, v, data.get('weight', 1)) for u, v, data in gnx.edges(data=True)]
+        keys.append(ResultStore.hashGraph(nodeindices, features, edges))
+    return keys
+
+
+def predict(vul, dataset, indices: list = None, onChunk=None):
+    '''
+    - `indices` (`list`): only predict the graphs at these indices if given
+    - `onChunk`: called with (indices, scores) after each chunk
+    '''
     gcnPath = MODELPATH+vul+'/GCN/'
     usePath = MODELPATH+vul+'/USE/'
 
     USEmodel = getUSEmodel(usePath)
-    GCNmodel = tf.keras.models.load_model(gcnPath)
-
-    graphs = getGraphs(dataset, USEmodel)
-    gen = PaddedGraphGenerator(graphs=graphs)
-    test_gen = gen.flow(graphs,
-                        batch_size=1,
-                        symmetric_normalization=SYMMETRIC,
-                        weighted=WEIGHTED
-                        )
-    print('graphs inited, starting test...')
-    y_hat = GCNmodel.predict(test_gen, verbose=0).ravel()
+    embed = getEmbedder(USEmodel, usePath)
+    GCNmodel = GCNModel(model=tf.keras.models.load_model(gcnPath))
+
+    print('starting test...')
+    y_hat = []
+    start = 0
+    for chunk in dataset.chunks(CHUNKSIZE, indices):
+        if isinstance(dataset, Corpus):
+            graphs = getGraphsFromCorpus(dataset, chunk, embed)
+        else:
+            graphs = getGraphs(chunk, embed)
+        y_hat.append(GCNmodel.predictBucketed(graphs, BUCKETNODES,
+                                              symmetric_normalization=SYMMETRIC,
+                                              weighted=WEIGHTED).ravel())
+        del graphs
+        if onChunk is not None:
+            chunkIndices = range(start, start + len(chunk))
+            if indices is not None:
+                chunkIndices = indices[start:start + len(chunk)]
+            onChunk(list(chunkIndices), y_hat[-1])
+        start += len(chunk)
+    y_hat = np.concatenate(y_hat) if len(y_hat) else np.array([])
 
     # free up memory
     del GCNmodel
+    del embed
     del USEmodel
-    del graphs
     tf.keras.backend.clear_session()
     gc.collect()
     return y_hat
 
 
-def dumpResult(vul, result):
+def dumpResult(vul, result, path: str = None):
+    '''
+    write the scores of `vul`, one per line, into `path` (`LOGPATH` by default)
+    '''
     import os
-    path = LOGPATH
+    path = path or LOGPATH
     if not os.path.exists(path):
         os.makedirs(path)
     with open(f'{path}{DATATYPE}.{vul}.log', 'w') as lg:
@@ -95,18 +210,56 @@ def dumpResult(vul, result):
             lg.write(str(y)+'\n')
 
 
+def modelKey(vul) -> str:
+    '''
+    return the `ResultStore` model of `vul`, from the digests of its GCN and USE models,
+    read from the digest files next to them, see `EmbeddingCache.modelDigest`
+    '''
+    digests = [EmbeddingCache.modelDigest(MODELPATH+vul+'/GCN/'), EmbeddingCache.modelDigest(MODELPATH+vul+'/USE/')]
+    return hashlib.sha256(''.join(digests).encode()).hexdigest()
+
+
+def score(vul, dataset, keys: list = None, store: ResultStore = None):
+    '''
+    return the scores of all graphs for `vul`,
+    with a store, only the graphs without a score for the current model are predicted,
+    each chunk is recorded as soon as it is predicted, so a crashed run resumes where it stopped
+    '''
+    if store is None:
+        return predict(vul, dataset)
+    model = modelKey(vul)
+    missing = store.missing(keys, model, vul)
+    print(f'{len(missing)} of {len(keys)} contracts to score')
+    if len(missing):
+        predict(vul, dataset, missing,
+                lambda indices, scores: store.add([keys[i] for i in indices], model, vul, scores))
+    return np.array(store.getScores(keys, model, vul), dtype=np.float32)
+
+
+def openStore(dataset) -> tuple:
+    '''
+    return (contract keys, `ResultStore`), (None, None) if `RESULTSTORE` is not set
+    '''
+    if RESULTSTORE is None:
+        return None, None
+    return getContractKeys(dataset), ResultStore(RESULTSTORE)
+
+
 def testAll():
-    dataset = Dataset(DATASET, WEIGHTED)
+    dataset = loadDataset()
     print('dataset inited')
+    keys, store = openStore(dataset)
     for vul in VULS:
         if not os.path.isdir(MODELPATH+vul):
             print(f'Warning: path not found: {MODELPATH+vul}')
             print('skipping...')
             continue
-        y_hat = predict(vul, dataset)
+        y_hat = score(vul, dataset, keys, store)
         # print(y_hat.T)
         dumpResult(vul, y_hat)
         print('finished: ', vul)
+    if EMBEDDINGCACHE is not None:
+        print('embedding cache:', getEmbeddingCache().getStats)
     print('done')
 
 
@@ -116,9 +269,10 @@ def testOne(index: int):
         print(f'Warning: path not found: {MODELPATH+vul}')
         print('skipping...')
         return
-    dataset = Dataset(DATASET, WEIGHTED)
-    print('dataset inited:', len(dataset.graphs))
-    y_hat = predict(vul, dataset)
+    dataset = loadDataset()
+    print('dataset inited:', len(dataset))
+    keys, store = openStore(dataset)
+    y_hat = score(vul, dataset, keys, store)
     # print(y_hat.T)
     dumpResult(vul, y_hat)
     print('finished: ', vul)
@@ -0,0 +1,44 @@
+import pytest
+from benchmark.common import dispatcherBinaries, syntheticBinaries
+from contract.Disassembler import Disassembler
+from cfg.FSG import FSG
+
+BINARIES = dispatcherBinaries(count=2, functions=8, depth=4) + syntheticBinaries(count=2, size=800)
+
+
+def build(code, maximized: bool = False) -> FSG:
+    fsg = FSG(code)
+    fsg.buildCFG(maximized=maximized)
+    return fsg
+
+
+@pytest.mark.parametrize('maximized', [False, True])
+@pytest.mark.parametrize('binary', BINARIES)
+def test_columnar_code_same_json(binary, maximized):
+    expected = build(Disassembler.disassemble(binary), maximized)
+    actual = build(Disassembler.disassembleColumnar(binary), maximized)
+    assert actual.toJson() == expected.toJson()
+    assert actual.toJson(showOrphanBlocks=True, semantic=True) == expected.toJson(showOrphanBlocks=True, semantic=True)
+    assert actual.getAPIsubgraph().toJson() == expected.getAPIsubgraph().toJson()
+    assert actual.getCombinedCFG().toJson(simplified=True) == expected.getCombinedCFG().toJson(simplified=True)
+
+
+def test_offset_lookup():
+    fsg = build(Disassembler.disassemble(BINARIES[0]))
+    for name, block in fsg.getNodes.items():
+        for index, instruction in enumerate(block.getInstructions):
+            assert fsg.findInstrcutionPositionByOffset(instruction.getOffset) == (name, index)
+    last = max(fsg.getNodes)
+    assert fsg.findInstrcutionPositionByOffset(-1) is None
+    assert fsg.findInstrcutionPositionByOffset((1 << 32) | last) is None
+    names, indices = fsg.findInstructionPositionsByOffsets([-1, (1 << 32) | last])
+    assert names.tolist() == indices.tolist() == [-1, -1]
+
+
+def test_offset_lookup_after_instructions_change():
+    fsg = build(Disassembler.disassemble(BINARIES[0]))
+    name, block = next((name, block) for name, block in fsg.getNodes.items() if len(block) > 1)
+    last = block.getInstructions[-1].getOffset
+    assert fsg.findInstrcutionPositionByOffset(last) == (name, len(block) - 1)
+    fsg.setBlockInstructions(block, block.getInstructions[:1])
+    assert fsg.findInstrcutionPositionByOffset(last) is None
@@ -0,0 +1,61 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark.common import dispatcherBinaries
+from contract.Disassembler import Disassembler
+from cfg.FSG import FSG
+from Dataset import Dataset, GraphSequence
+
+LABELS = ['reentrancy-eth', 'suicidal', 'tx-origin']
+
+
+@pytest.fixture(scope='module')
+def csvFile(tmp_path_factory):
+    rows = []
+    for k, binary in enumerate(dispatcherBinaries(count=3, functions=4, depth=3)):
+        fsg = FSG(Disassembler.disassemble(binary))
+        fsg.buildCFG()
+        for normalized in (False, True):
+            # indented json: the quoted cells span several lines
+            cfg = json.dumps(fsg.toJson(normalized=normalized), indent=1)
+            rows.append([f'0x{k:040x}', cfg] + [(k + j + normalized) % 2 for j in range(len(LABELS))])
+    path = tmp_path_factory.mktemp('dataset') / 'dataset.csv'
+    pd.DataFrame(rows, columns=['address', 'cfg'] + LABELS).to_csv(path, index=False)
+    return str(path)
+
+
+def same(actual, expected) -> bool:
+    (actualGraph, actualIndices, actualFeatures), (expectedGraph, expectedIndices, expectedFeatures) = actual, expected
+    return (actualIndices == expectedIndices and actualFeatures == expectedFeatures
+            and list(actualGraph.edges(data=True)) == list(expectedGraph.edges(data=True)))
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_streaming_same_as_loaded(csvFile, weighted):
+    expected = Dataset(csvFile, weighted, streaming=False)
+    actual = Dataset(csvFile, weighted, streaming=True)
+    assert isinstance(actual.graphs, GraphSequence)
+    assert len(actual) == len(expected) == 6
+    assert list(actual.labels) == list(expected.labels) == LABELS
+    for label in LABELS:
+        assert actual.labels[label].tolist() == expected.labels[label].tolist()
+    np.testing.assert_array_equal(actual.mulHotLabels, expected.mulHotLabels)
+    for index, graph in enumerate(actual.graphs):
+        assert same(graph, expected[index])
+        assert same(actual[index], expected[index])
+    assert same(actual[-1], expected[-1])
+    assert all(same(a, e) for a, e in zip(actual.graphs[1:5:2], expected.graphs[1:5:2]))
+
+
+def test_streaming_chunks(csvFile):
+    expected = Dataset(csvFile, streaming=False)
+    actual = Dataset(csvFile, streaming=True)
+    for indices in (None, [5, 0, 3]):
+        actualChunks = list(actual.chunks(4, indices))
+        expectedChunks = list(expected.chunks(4, indices))
+        assert [len(chunk) for chunk in actualChunks] == [len(chunk) for chunk in expectedChunks]
+        for actualChunk, expectedChunk in zip(actualChunks, expectedChunks):
+            assert all(same(a, e) for a, e in zip(actualChunk, expectedChunk))
+    with pytest.raises(IndexError):
+        actual[len(actual)]
@@ -0,0 +1,40 @@
+import pytest
+from contract.Disassembler import Disassembler
+from benchmark.common import syntheticBinaries
+
+
+def instructions(code) -> list:
+    return [(offset, type(i), i.getOffset, i.getName, i.getOperand, str(i)) for offset, i in code]
+
+
+BINARIES = syntheticBinaries(count=3, size=2048) + [
+    bytes(range(256)).hex(),  # every opcode once
+    '6001600201',  # PUSH1 1 PUSH1 2 ADD
+    '60',  # PUSH1 without operand
+    '7f' + 'ab' * 10,  # truncated PUSH32
+    '',
+]
+
+
+@pytest.mark.parametrize('binary', BINARIES)
+def test_disassemble_matches_hex_walk(binary):
+    expected = instructions(Disassembler.disassembleHex(binary))
+    assert instructions(Disassembler.disassemble(binary)) == expected
+    assert instructions(Disassembler.disassemble('0x' + binary)) == expected
+    assert instructions(Disassembler.disassembleColumnar(binary)) == expected
+
+
+def test_disassemble_falls_back_on_irregular_strings():
+    binary = '6001 6002'  # skipped by bytes.fromhex, read as it is by the hex walk
+    expected = instructions(Disassembler.disassembleHex(binary))
+    assert instructions(Disassembler.disassemble(binary)) == expected
+    assert instructions(Disassembler.disassembleColumnar(binary)) == expected
+
+
+def test_disassemble_instructions_are_not_shared():
+    binary = '6001' * 4
+    first = Disassembler.disassemble(binary)
+    second = Disassembler.disassemble(binary)
+    assert all(a is not b for (_, a), (_, b) in zip(first, second))
+    offsets = [offset for offset, _ in first]
+    assert len({id(first.get(offset)) for offset in offsets}) == len(offsets)
@@ -0,0 +1,42 @@
+import pytest
+from benchmark.common import dispatcherBinaries
+from contract.Disassembler import Disassembler
+from cfg.FSG import FSG
+from cfg.Edge import Edge
+
+BINARIES = dispatcherBinaries(count=2, functions=8, depth=4)
+
+
+def build(binary: str, maximized: bool = False) -> FSG:
+    fsg = FSG(Disassembler.disassemble(binary))
+    fsg.buildCFG(maximized=maximized)
+    return fsg
+
+
+def edges(cfg) -> list:
+    return [(edge.getFrom.getName, edge.getTo.getName, edge.getType, edge.getWeight) for edge in cfg.getEdges]
+
+
+@pytest.mark.parametrize('maximized', [False, True])
+@pytest.mark.parametrize('binary', BINARIES)
+def test_contraction_same_edges_as_removal(binary, maximized):
+    fsg = build(binary, maximized)
+    removal = fsg.generateAPIsubgraph(contraction=False)
+    contracted = fsg.generateAPIsubgraph(contraction=True)
+    assert set(contracted.getNodes) == set(removal.getNodes)
+    assert sorted(edges(contracted)) == sorted(edges(removal))
+    assert len(edges(contracted)) == len(set(edges(contracted)))
+    # the edges between remaining blocks come first, as `_removeBlock` keeps them
+    types = [edge.getType == Edge.COMBINE for edge in contracted.getEdges]
+    assert types == sorted(types)
+    for name, block in contracted.getNodes.items():
+        assert {b.getName for b in block.getSuccessors} == {e.getTo.getName for e in contracted.getOutEdges(name)}
+        assert {b.getName for b in block.getPredecessors} == {e.getFrom.getName for e in contracted.getInEdges(name)}
+
+
+@pytest.mark.parametrize('binary', BINARIES)
+def test_api_subgraph_json_is_deterministic(binary):
+    first = build(binary)
+    second = build(binary)
+    assert first.getAPIsubgraph().toJson() == second.getAPIsubgraph().toJson()
+    assert first.getCombinedCFG().toJson(simplified=True) == second.getCombinedCFG().toJson(simplified=True)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+stellargraph = pytest.importorskip('stellargraph')
+from stellargraph.mapper import PaddedGraphGenerator  # noqa: E402
+from GCNModel import GCNModel  # noqa: E402
+
+FEATURES = 16
+SIZES = [3, 150, 7, 1, 60, 12, 220, 2]
+
+
+def randomGraph(nodes: int, rnd: np.random.Generator):
+    features = pd.DataFrame(rnd.standard_normal((nodes, FEATURES)).astype(np.float32))
+    sources = rnd.integers(0, nodes, 2 * nodes)
+    targets = rnd.integers(0, nodes, 2 * nodes)
+    edges = pd.DataFrame({'source': sources, 'target': targets, 'weight': rnd.random(2 * nodes)})
+    return stellargraph.StellarDiGraph(features, edges)
+
+
+@pytest.fixture(scope='module')
+def graphs():
+    rnd = np.random.default_rng(0)
+    return [randomGraph(nodes, rnd) for nodes in SIZES]
+
+
+@pytest.mark.parametrize('labels', [None, ['reentrancy-eth', 'suicidal', 'tx-origin']])
+def test_predictBucketed_matches_predict(graphs, labels):
+    tf.random.set_seed(0)
+    model = GCNModel(graphs, labels=labels)
+    generator = PaddedGraphGenerator(graphs=graphs)
+    expected = np.concatenate([model.predict(generator.flow([graph], batch_size=1, weighted=True))
+                               for graph in graphs]).reshape(len(graphs), model.outputs)
+    # small budgets, so graphs of different sizes share a padded batch
+    for maxNodes, maxEdges in [(8192, None), (400, None), (1000, 300)]:
+        actual = model.predictBucketed(graphs, maxNodes, maxEdges, weighted=True)
+        np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
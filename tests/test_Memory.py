@@ -0,0 +1,81 @@
+import random
+from evm.Memory import Memory
+from evm.Variable import Variable
+
+WORD = Memory.WORD_SIZE
+
+
+class StringMemory:
+    '''
+    the hex string model `Memory` replaced, as reference
+    '''
+
+    def __init__(self) -> None:
+        self.memory = ''
+
+    def expand(self, offset: int, size: int):
+        if offset + size > len(self.memory) // 2:
+            words = (offset + size - len(self.memory) // 2 + WORD - 1) // WORD
+            self.memory += '0' * (WORD * 2 * words)
+
+    def loads(self, offset: int) -> int:
+        self.expand(offset, WORD)
+        return int(self.memory[offset * 2:(offset + WORD) * 2], 16)
+
+    def stores(self, offset: int, value: int, size: int):
+        self.expand(offset, size)
+        self.memory = self.memory[:offset * 2] + f"{value:0{size*2}x}"[:size * 2] + self.memory[(offset + size) * 2:]
+
+    def copys(self, dest: int, offset: int, size: int):
+        self.expand(offset, size)
+        self.expand(dest, size)
+        self.memory = self.memory[:dest * 2] + self.memory[offset * 2:(offset + size) * 2] + self.memory[(dest + size) * 2:]
+
+
+def test_memory_matches_string_model():
+    rnd = random.Random(0)
+    memory, reference = Memory(), StringMemory()
+    for _ in range(2000):
+        operation = rnd.randrange(3)
+        offset = rnd.randrange(300)
+        if operation == 0:
+            size = rnd.choice([1, WORD])
+            # values too large for `size` keep their leading digits
+            value = rnd.getrandbits(rnd.choice([8, 256, 300]))
+            memory.stores(offset, value, size)
+            reference.stores(offset, value, size)
+        elif operation == 1:
+            size = rnd.randrange(64)
+            dest = rnd.randrange(300)
+            memory.copys(dest, offset, size)
+            reference.copys(dest, offset, size)
+        else:
+            assert memory.loads(offset) == reference.loads(offset)
+        assert str(memory) == reference.memory
+        assert memory.getSize * 2 == len(reference.memory)
+
+
+def test_memory_copy_isolation():
+    memory = Memory()
+    memory.stores(0, 1)
+    copy = memory.copy()
+    copy.stores(0, 2)
+    copy.copys(64, 0, WORD)
+    memory.store(Variable(32), Variable(3))
+    assert (memory.loads(0), memory.loads(32), memory.getSize) == (1, 3, 64)
+    assert (copy.loads(0), copy.loads(32), copy.loads(64), copy.getSize) == (2, 0, 2, 96)
+    assert copy.load(Variable(32)).getValue == 0
+    # expanding a shared buffer does not expand the other memory
+    other = memory.copy()
+    other.loads(200)
+    assert memory.getSize == 64 and len(str(memory)) == 128
+
+
+def test_memory_load_raw_view_during_expansion():
+    memory = Memory()
+    memory.stores(0, 0xab, 1)
+    with memory.loadRaw(0, 1) as view:
+        memory.stores(100, 0xcd, 1)  # expands while the view is alive
+        assert bytes(view) == b'\xab'
+    assert memory.loadRaw(100, 1).tobytes() == b'\xcd'
+    assert memory.loads(0) >> (8 * (WORD - 1)) == 0xab
@@ -0,0 +1,62 @@
+import pytest
+from ResultStore import ResultStore
+
+CONTRACTS = [f'c{i}' for i in range(10)] + ['c3']  # a contract twice
+MODEL = 'digest'
+VUL = 'reentrancy-eth'
+
+
+def predict(indices: list) -> list:
+    return [int(CONTRACTS[i][1:]) / 10 for i in indices]
+
+
+def score(store: ResultStore, chunkSize: int = 3, crashAfter: int = None) -> list:
+    '''
+    `test.score` with a model that fails after `crashAfter` chunks, return the predicted indices
+    '''
+    missing = store.missing(CONTRACTS, MODEL, VUL)
+    predicted = []
+    for chunk, start in enumerate(range(0, len(missing), chunkSize)):
+        if chunk == crashAfter:
+            raise RuntimeError('crash')
+        indices = missing[start:start + chunkSize]
+        store.add([CONTRACTS[i] for i in indices], MODEL, VUL, predict(indices))
+        predicted += indices
+    return predicted
+
+
+def test_resume_after_crash(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    with pytest.raises(RuntimeError):
+        score(ResultStore(path), crashAfter=2)
+    store = ResultStore(path)
+    assert len(store) == 6
+    predicted = score(store)
+    assert predicted == list(range(6, 10))  # c3 again is already scored
+    expected = predict(range(len(CONTRACTS)))
+    assert store.getScores(CONTRACTS, MODEL, VUL) == expected
+    assert ResultStore(path).getScores(CONTRACTS, MODEL, VUL) == expected
+    assert score(ResultStore(path)) == []
+
+
+def test_resume_after_truncated_line(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    store = ResultStore(path)
+    store.add(['c0', 'c1'], MODEL, VUL, [0.0, 0.1])
+    with open(path, 'ab') as fp:
+        fp.write(b'{"contract": "c2", "model": "dig')  # a write cut by a crash
+    store = ResultStore(path)
+    assert len(store) == 2
+    assert store.missing(CONTRACTS, MODEL, VUL)[0] == 2
+    score(store)
+    store = ResultStore(path)
+    assert store.getScores(CONTRACTS, MODEL, VUL) == predict(range(len(CONTRACTS)))
+
+
+def test_other_model_or_vulnerability_is_missing(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    store = ResultStore(path)
+    score(store)
+    assert store.missing(CONTRACTS, 'other digest', VUL) == list(range(10))
+    assert store.missing(CONTRACTS, MODEL, 'suicidal') == list(range(10))
+    assert store.get('c3', 'other digest', VUL) is None
@@ -0,0 +1,71 @@
+from evm.State import State
+from evm.Stack import Stack
+from evm.Storage import Storage
+from evm.Memory import Memory
+from evm.Variable import Variable
+
+
+def test_stack_copy_isolation():
+    stack = Stack()
+    stack.pushes([Variable(2), Variable(1)])
+    copy = stack.copy()
+    copy.push(Variable(3))
+    assert stack.getLength == 2 and copy.getLength == 3
+    stack.pop()
+    assert stack.getLength == 1 and copy.getLength == 3
+    assert [item.getValue for item in copy.pops(3)] == [3, 2, 1]
+    assert [item.getValue for item in stack.pops(1)] == [1]
+
+
+def test_storage_copy_isolation():
+    storage = Storage()
+    storage.store(Variable(1), Variable(10))
+    copy = storage.copy()
+    copy.store(Variable(1), Variable(11))
+    copy.store(Variable(2), Variable(20))
+    storage.store(Variable(3), Variable(30))
+    assert storage.load(Variable(1)).getValue == 10
+    assert not storage.load(Variable(2)).hasValue
+    assert copy.load(Variable(1)).getValue == 11
+    assert not copy.load(Variable(3)).hasValue
+
+
+def test_storage_deep_copies_are_flattened():
+    storage = Storage()
+    copies = []
+    for k in range(3 * Storage.MAX_DEPTH):
+        storage.store(Variable(k), Variable(k))
+        copies.append(storage.copy())
+    assert len(storage._storage.maps) <= Storage.MAX_DEPTH + 2
+    for k, copy in enumerate(copies):
+        assert copy.load(Variable(k)).getValue == k
+        assert not copy.load(Variable(k + 1)).hasValue
+    assert [storage.load(Variable(k)).getValue for k in range(3 * Storage.MAX_DEPTH)] == list(range(3 * Storage.MAX_DEPTH))
+
+
+def test_state_copy_isolation():
+    state = State(None)
+    state.stack.push(Variable(1))
+    state.memory.store(Variable(0), Variable(5))
+    state.storage.store(Variable(0), Variable(7))
+    copy = state.copy()
+    copy.pc = 4
+    copy.stack.push(Variable(2))
+    copy.memory.store(Variable(32), Variable(6))
+    copy.storage.store(Variable(0), Variable(8))
+    assert state.pc == 0 and state.stack.getLength == 1
+    assert state.memory.getSize == 32 and copy.memory.getSize == 64
+    assert state.storage.load(Variable(0)).getValue == 7
+    assert copy.storage.load(Variable(0)).getValue == 8
+    assert copy.memory.load(Variable(0)).getValue == 5
+
+
+def test_memory_set_type_does_not_change_copies():
+    memory = Memory()
+    variable = Variable(5)
+    memory.store(Variable(0), variable)
+    copy = memory.copy()
+    assert copy.setType(Variable(0), 'uint256')
+    assert copy.load(Variable(0)).getType == 'uint256'
+    assert not memory.load(Variable(0)).hasType
+    assert not variable.hasType